@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the offline code paths.
+
+Runs `python -X importtime` in a fresh interpreter for each module, reports
+the cumulative import time, and fails (exit 1) when a module exceeds the
+budget or drags in Bleak. Intended for CI / scripted tooling checks.
+"""
+import argparse
+import subprocess
+import sys
+
+MODULES = [
+    "vesc_ble_can",
+    "vesc_ble_can.vesc_crc",
+    "vesc_ble_can.vesc_packet",
+    "vesc_ble_can.vesc_decode",
+    "vesc_ble_can.ble_helper",
+    "vesc_ble_can.cli",
+]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Measure vesc_ble_can import time")
+    p.add_argument("--budget-ms", type=float, default=100.0, help="Max cumulative import time per module (ms)")
+    p.add_argument("--runs", type=int, default=5, help="Runs per module (best is reported)")
+    return p
+
+
+def measure(module: str):
+    """
+    Returns (cumulative_us, imported_module_names) for one cold import.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [x.strip() for x in line[len("import time:"):].split("|")]
+        if not parts[1].isdigit():
+            continue  # header line
+        name = parts[2]
+        imported.add(name.strip())
+        if name.strip() == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us, imported
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    rc = 0
+    for module in MODULES:
+        best_us = None
+        imported = set()
+        for _ in range(max(1, args.runs)):
+            us, imported = measure(module)
+            best_us = us if best_us is None else min(best_us, us)
+
+        ms = best_us / 1000.0
+        pulls_bleak = any(n == "bleak" or n.startswith("bleak.") for n in imported)
+        ok = ms <= args.budget_ms and not pulls_bleak
+        rc |= 0 if ok else 1
+        note = " (imports bleak!)" if pulls_bleak else ""
+        print(f"{'OK  ' if ok else 'FAIL'} {module:28s} {ms:7.1f} ms{note}")
+
+    return rc
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
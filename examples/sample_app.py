@@ -53,6 +53,8 @@ async def keyboard_custom_data_loop(
     sys.stdout.write("> ")
     sys.stdout.flush()
 
+    stream = client.command_stream(active_can_id)
+
     fd = sys.stdin.fileno()
     old_settings = termios.tcgetattr(fd)
 
@@ -75,14 +77,14 @@ async def keyboard_custom_data_loop(
                 key_num = ord(ch) - ord("0")   # '0'→0, '1'→1, ..., '9'→9
                 cmd_value = key_num & 0x0F     # ensure 0x00–0x09
 
-                try:
-                    await client.send_custom_app_data_can(active_can_id, cmd_value)
-                    print(
-                        f"\n[TX] CAN {active_can_id} → COMM_CUSTOM_APP_DATA "
-                        f"[0x01, 0x{cmd_value:02X}]"
-                    )
-                except Exception as e:
-                    print(f"\n❌ Failed to send custom data: {e}")
+                # Latest-wins: a burst of key presses never queues stale commands.
+                stream.set(cmd_value)
+                st = stream.stats
+                print(
+                    f"\n[TX] CAN {active_can_id} → COMM_CUSTOM_APP_DATA "
+                    f"[0x{cmd_value:02X}] (latency {st.last_latency_ms:.1f} ms, "
+                    f"coalesced {st.coalesced})"
+                )
 
             sys.stdout.write("> ")
             sys.stdout.flush()
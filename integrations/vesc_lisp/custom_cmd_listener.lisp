@@ -10,57 +10,69 @@
 ;;   0x02 -> Reverse
 ;;
 ;; Intended to be used with:
-;;   - vesc-ble-can (Python BLE ↔ CAN library)
+;;   - vesc-ble-can (Python BLE ↔ CAN library), including
+;;     client.command_stream(can_id) for high-rate setpoints
 ;;   - VESC Tool QML UI
 ;;
 ;; NOTE:
+;; - The RX handler only latches the newest command (latest wins);
+;;   it never sleeps, so a burst of commands cannot queue up.
+;; - A control loop applies the latched command while it is fresh
+;;   and stops the motor RUN_LENGTH seconds after the last one.
 ;; - Temporarily switches app mode for direct RPM control
-;; - Restores previous app after command execution
+;; - Restores previous app once commands stop arriving
 ;; =========================================================
 
 ;; ==========================
 ;; Config
 ;; ==========================
 (def SPEED_ERPM 4000)
-(def RUN_LENGTH 0.2)
+(def RUN_LENGTH 0.2)   ; hold time after the last received command
+(def LOOP_HZ 50)
 
 ;; ==========================
-;; Handle CMD
+;; Latest command (latched)
 ;; ==========================
-(defun handle-cmd (data)
-  {
-    (if (eq data 1) {
-        (print "Forward")
-        (conf-set 'app-to-use 3)
-        (set-rpm SPEED_ERPM)
-        (sleep RUN_LENGTH)
-        (conf-set 'app-to-use 2)
-        })
+(def latest-cmd -1)
+(def latest-time (systime))
 
-    (if (eq data 2) {
-        (print "Reverse")
-        (conf-set 'app-to-use 3)
-        (set-rpm (- 0 SPEED_ERPM))
-        (sleep RUN_LENGTH)
-        (conf-set 'app-to-use 2)
-        })
+(defun cmd-to-erpm (cmd)
+  (cond
+    ((eq cmd 1) SPEED_ERPM)
+    ((eq cmd 2) (- 0 SPEED_ERPM))
+    (t 0)))
 
-    (if (eq data 0) {
-        (print "Stop")
-        (conf-set 'app-to-use 3)
-        (set-rpm 0)
-        (sleep RUN_LENGTH)
-        (conf-set 'app-to-use 2)
-        })
-  }
-)
+;; ==========================
+;; Control loop
+;; ==========================
+(defun control-loop () {
+  (var active nil)
+  (loopwhile t {
+    (if (and (>= latest-cmd 0) (< (secs-since latest-time) RUN_LENGTH))
+        {
+          (if (not active) {
+              (conf-set 'app-to-use 3)
+              (setq active t)
+              })
+          (set-rpm (cmd-to-erpm latest-cmd))
+        }
+        (if active {
+            (set-rpm 0)
+            (conf-set 'app-to-use 2)
+            (setq active nil)
+            }))
+    (sleep (/ 1.0 LOOP_HZ))
+  })
+})
 
 ;; ==========================
 ;; RX Handler
 ;; ==========================
 (defun proc-data (data) {
-  (if (> (buflen data) 0)
-      (handle-cmd (bufget-u8 data 0)))
+  (if (> (buflen data) 0) {
+      (setq latest-cmd (bufget-u8 data 0))
+      (setq latest-time (systime))
+      })
 })
 
 (defun event-handler () {
@@ -71,6 +83,7 @@
   )
 })
 
+(spawn control-loop)
 (event-register-handler (spawn event-handler))
 (event-enable 'event-data-rx)
 
@@ -1 +1,10 @@
-from .client import VescBleCanClient
+# The client pulls in Bleak; load it on first use so protocol-only imports
+# (vesc_crc, vesc_packet, vesc_decode, ble_helper) stay lightweight.
+
+def __getattr__(name):
+    if name == "VescBleCanClient":
+        from .client import VescBleCanClient
+        return VescBleCanClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ["VescBleCanClient"]
@@ -1,73 +1,133 @@
+import time
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 from .vesc_crc import crc16_ccitt_init0
 
+# Largest payload the firmware sends (its PACKET_MAX_PL_LEN), e.g. a
+# COMM_GET_MCCONF reply. Longer lengths can only be a misread header: a
+# damaged frame's 0x03 end byte followed by the next frame's "02 len"
+# decodes as a long frame of 512+ bytes and would stall every frame after it.
+MAX_PAYLOAD = 512
+MAX_FRAME = MAX_PAYLOAD + 6
+
+# A partial frame older than this is abandoned on the next feed(), like the
+# firmware's packet RX timeout: fragments of one frame arrive back to back.
+RX_TIMEOUT_S = 0.1
+
 @dataclass
 class BLEPacket:
     payload: bytes
 
 class BLEHelperPy:
-    def __init__(self):
+    def __init__(self, rx_timeout_s: Optional[float] = RX_TIMEOUT_S):
+        self.rx_timeout_s = rx_timeout_s
+        self.last_rx = 0.0
         self.counter = 0
-        self.endMessage = 512
+        self.endMessage = MAX_FRAME
         self.messageRead = False
-        self.messageReceived = bytearray(512)
+        self.messageReceived = bytearray(MAX_FRAME)
         self.lenPayload = 0
-        self.payload = bytearray(512)
+        self.payload = bytearray(MAX_FRAME)
         self.payloadStart = 0
+        self.consumed = 0  # bytes used by the last processIncomingBytes() call
+        # Bytes after a false start byte, to be scanned again (see _drop_frame)
+        self.rescan = b""
 
     def getPayload(self) -> bytes:
         return bytes(self.payload[: self.lenPayload])
 
     def resetPacket(self):
+        # Buffers are indexed by counter/lenPayload, so stale bytes never leak
+        # into a later packet and need not be zeroed.
         self.messageRead = False
         self.counter = 0
-        self.endMessage = 512
+        self.endMessage = MAX_FRAME
         self.lenPayload = 0
         self.payloadStart = 0
-        for i in range(512):
-            self.messageReceived[i] = 0
-            self.payload[i] = 0
+
+    def _drop_frame(self):
+        # The start byte was false (or the frame is damaged): a real frame may
+        # begin anywhere after it, so keep those bytes for another scan
+        # instead of losing every frame they overlap.
+        self.rescan = bytes(self.messageReceived[1:self.counter])
+        self.resetPacket()
 
     def unpackPayload(self) -> bool:
         crcMessage = (self.messageReceived[self.endMessage - 3] << 8) | self.messageReceived[self.endMessage - 2]
 
-        for i in range(self.lenPayload):
-            self.payload[i] = self.messageReceived[i + self.payloadStart]
+        start = self.payloadStart
+        self.payload[: self.lenPayload] = self.messageReceived[start : start + self.lenPayload]
 
         crcPayload = crc16_ccitt_init0(self.payload, 0, self.lenPayload)
         return crcPayload == crcMessage
 
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Process a chunk that may hold several (or partial) frames, e.g. a
+        coalesced BLE notification or a TCP read. Returns every complete,
+        CRC-valid payload in order; partial frames carry over to the next call
+        unless more than rx_timeout_s passed since the previous one.
+        """
+        now = time.monotonic()
+        if self.counter and self.rx_timeout_s is not None and now - self.last_rx > self.rx_timeout_s:
+            # Stale partial frame (lost fragment or false start): resync
+            self._drop_frame()
+            data, self.rescan = self.rescan + bytes(data), b""
+        self.last_rx = now
+
+        out: List[bytes] = []
+        while data:
+            n = self.processIncomingBytes(data)
+            if n > 0:
+                out.append(self.getPayload())
+                self.resetPacket()
+            data = data[self.consumed:]
+            if self.rescan:
+                data, self.rescan = self.rescan + data, b""
+        return out
+
     def processIncomingBytes(self, incomingData: List[int]) -> int:
+        self.consumed = 0
         for b in incomingData:
+            self.consumed += 1
             self.messageReceived[self.counter] = b
             self.counter += 1
 
-            if self.counter == 2:
-                start_byte = self.messageReceived[0]
-                if start_byte == 2:
+            if self.counter == 1:
+                if b != 2 and b != 3:
+                    self.resetPacket()  # not a start byte: resync on the next one
+                    return 0
+            elif self.counter == 2:
+                if self.messageReceived[0] == 2:
                     self.lenPayload = self.messageReceived[1]
                     self.endMessage = self.lenPayload + 5
                     self.payloadStart = 2
-                elif start_byte == 3:
-                    if self.counter < 3:
-                        continue
-                    self.lenPayload = (self.messageReceived[1] << 8) | self.messageReceived[2]
-                    self.endMessage = self.lenPayload + 6
-                    self.payloadStart = 3
-                else:
-                    self.resetPacket()
-                    return 0
+                    if self.lenPayload == 0:
+                        self._drop_frame()
+                        break
+            elif self.counter == 3 and self.messageReceived[0] == 3:
+                self.lenPayload = (self.messageReceived[1] << 8) | self.messageReceived[2]
+                self.endMessage = self.lenPayload + 6
+                self.payloadStart = 3
+                # Senders use short (0x02) frames below 256 bytes
+                if not 256 <= self.lenPayload <= MAX_PAYLOAD:
+                    self._drop_frame()
+                    break
 
-            if self.counter >= len(self.messageReceived):
-                self.resetPacket()
+            if self.counter == self.endMessage:
+                if self.messageReceived[self.endMessage - 1] == 3:
+                    self.messageRead = True
+                else:
+                    self._drop_frame()
                 break
 
-            if self.counter == self.endMessage and self.messageReceived[self.endMessage - 1] == 3:
-                self.messageRead = True
+            if self.counter >= len(self.messageReceived) or self.endMessage > len(self.messageReceived):
+                self._drop_frame()
                 break
 
         if self.messageRead:
-            return self.lenPayload if self.unpackPayload() else 0
+            if self.unpackPayload():
+                return self.lenPayload
+            self._drop_frame()  # bad CRC
         return 0
@@ -1,11 +1,14 @@
 import asyncio
+import bisect
 import time
-from typing import Optional
-
-from bleak import BleakClient, BleakScanner
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Optional, Sequence, Tuple
 
 from .config import NUS_RX_WRITE, BLE_CHUNK, NUS_SERVICE_UUID
-from .vesc_packet import make_forward_can_get_values, make_custom_app_data, make_forward_can_custom_app_data
+from .vesc_packet import encode_poll_cycle, make_forward_can_get_values
+
+if TYPE_CHECKING:
+    from bleak import BleakClient
 
 async def find_device(
     *,
@@ -56,6 +59,8 @@ async def find_device(
                     if found_by_nus is None:
                         found_by_nus = device
 
+    from bleak import BleakScanner
+
     print(f"Scanning ({timeout_s:.0f}s)...")
     scanner = BleakScanner(cb)
     await scanner.start()
@@ -78,24 +83,179 @@ async def find_device(
     return first_seen
 
 
-async def ble_write_chunked(client: BleakClient, data: bytes, without_response: bool = True):
-    for i in range(0, len(data), BLE_CHUNK):
-        chunk = data[i:i + BLE_CHUNK]
+async def ble_write_chunked(
+    client: "BleakClient",
+    data: bytes,
+    without_response: bool = True,
+    chunk_size: int = BLE_CHUNK,
+    pace_s: float = 0.03,
+):
+    for i in range(0, len(data), chunk_size):
+        chunk = data[i:i + chunk_size]
         await client.write_gatt_char(NUS_RX_WRITE, chunk, response=not without_response)
-        await asyncio.sleep(0.03)
+        await asyncio.sleep(pace_s)
+
+
+class BleTxWriter:
+    """
+    Single writer for the NUS RX characteristic.
+
+    All frames go through one task so they never interleave on the link.
+    Priority frames (e.g. setpoints) jump ahead of queued normal frames
+    (telemetry requests). A normal buffer made of several frames (a batched
+    poll cycle) is interrupted at the next frame boundary when priority
+    data arrives, so setpoints never wait for the whole buffer.
+    """
+
+    def __init__(
+        self,
+        client: "BleakClient",
+        chunk_size: int = BLE_CHUNK,
+        pace_s: float = 0.03,
+    ):
+        self._client = client
+        self.chunk_size = chunk_size
+        self.pace_s = pace_s
+
+        # (data, response, future, frame end offsets or None, chunk size or None)
+        self._high: Deque[Tuple[bytes, bool, asyncio.Future, Optional[Sequence[int]], Optional[int]]] = deque()
+        self._low: Deque[Tuple[bytes, bool, asyncio.Future, Optional[Sequence[int]], Optional[int]]] = deque()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task = self._task
+        self._task = None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        for q in (self._high, self._low):
+            while q:
+                _, _, fut, _, _ = q.popleft()
+                if not fut.done():
+                    fut.set_exception(RuntimeError("BLE TX writer stopped"))
+
+    @property
+    def pending(self) -> int:
+        return len(self._high) + len(self._low)
+
+    async def write(
+        self,
+        data: bytes,
+        priority: bool = False,
+        response: bool = False,
+        frame_ends: Optional[Sequence[int]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> float:
+        """
+        Queue data for writing and wait until its last chunk is on the link.
+        Returns the time.monotonic() timestamp of that last chunk.
+
+        frame_ends (ascending end offsets of the frames packed into data)
+        lets priority frames be sent between them. chunk_size overrides
+        self.chunk_size for this write (e.g. MTU-sized chunks for a batch).
+        """
+        if self._task is None:
+            raise RuntimeError("BLE TX writer not started")
+
+        fut = asyncio.get_running_loop().create_future()
+        (self._high if priority else self._low).append((data, response, fut, frame_ends, chunk_size))
+        self._wake.set()
+        return await fut
+
+    async def _run(self) -> None:
+        while True:
+            if not self._high and not self._low:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            if self._high:
+                await self._send(*self._high.popleft())
+            else:
+                await self._send(*self._low.popleft(), preemptible=True)
+
+    async def _send(
+        self,
+        data: bytes,
+        response: bool,
+        fut: asyncio.Future,
+        frame_ends: Optional[Sequence[int]],
+        chunk_size: Optional[int],
+        preemptible: bool = False,
+    ) -> None:
+        if fut.done():
+            return
+        if not data:
+            fut.set_result(time.monotonic())
+            return
+
+        preemptible = preemptible and bool(frame_ends)
+        chunk_size = chunk_size or self.chunk_size
+        pos = 0
+        try:
+            while pos < len(data):
+                end = min(pos + chunk_size, len(data))
+                if preemptible and self._high:
+                    # Cut this chunk at the next frame boundary
+                    k = bisect.bisect_right(frame_ends, pos)
+                    if k < len(frame_ends):
+                        end = min(end, frame_ends[k])
+                await self._client.write_gatt_char(NUS_RX_WRITE, data[pos:end], response=response)
+                pos = end
+                if pos >= len(data) and not fut.done():
+                    fut.set_result(time.monotonic())
+                await asyncio.sleep(self.pace_s)
+
+                if preemptible and self._high and pos < len(data):
+                    k = bisect.bisect_left(frame_ends, pos)
+                    if k < len(frame_ends) and frame_ends[k] == pos:
+                        while self._high:
+                            await self._send(*self._high.popleft())
+        except asyncio.CancelledError:
+            if not fut.done():
+                fut.cancel()
+            raise
+        except Exception as e:
+            if not fut.done():
+                fut.set_exception(e)
 
 
 async def poll_get_values_periodic(
-    client: BleakClient,
+    client: "BleakClient",
     can_ids,
     interval_s: float = 0.5,
+    batch: bool = False,
+    chunk_size: int = BLE_CHUNK,
 ):
+    """
+    Periodically request COMM_GET_VALUES from each CAN ID, writing straight
+    to the Bleak client. Kept for existing callers; VescBleCanClient's
+    start_polling_get_values() adds the TX writer, timeouts and loss
+    tracking on top.
+
+    With batch=True the whole cycle is pre-encoded once and written as
+    back-to-back chunk_size slices.
+    """
+    can_ids = list(can_ids)
+    cycle = encode_poll_cycle(can_ids) if batch else None
+    reqs = [make_forward_can_get_values(cid) for cid in can_ids]
     try:
         while True:
-            for cid in can_ids:
-                req = make_forward_can_get_values(cid)
-                await ble_write_chunked(client, req, without_response=True)
-                await asyncio.sleep(0.01)
+            if cycle is not None:
+                await ble_write_chunked(client, cycle, without_response=True, chunk_size=chunk_size)
+            else:
+                for req in reqs:
+                    await ble_write_chunked(client, req, without_response=True, chunk_size=chunk_size)
+                    await asyncio.sleep(0.01)
             await asyncio.sleep(interval_s)
     except asyncio.CancelledError:
         pass
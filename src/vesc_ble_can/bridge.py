@@ -0,0 +1,226 @@
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Set, Tuple
+
+from .ble_helper import BLEHelperPy
+from .config import (
+    COMM_FORWARD_CAN,
+    COMM_FW_VERSION,
+    COMM_GET_APPCONF,
+    COMM_GET_MCCONF,
+    COMM_GET_VALUES,
+    COMM_GET_VALUES_SETUP,
+    COMM_GET_VALUES_SETUP_SELECTIVE,
+    COMM_LISP_READ_CODE,
+)
+from .vesc_decode import GET_VALUES_VESC_ID_OFFSET
+from .vesc_packet import vesc_pack
+
+if TYPE_CHECKING:
+    from .client import VescBleCanClient
+
+# Drop a TCP client whose unsent data grows beyond this (it is not reading)
+MAX_CLIENT_BUFFER = 256 * 1024
+
+# Get-type requests: each one is answered by a reply with the same COMM ID and
+# sending it twice changes nothing, so identical ones in flight can be merged.
+# Every other payload (setpoints, writes, ...) is always forwarded.
+REPLY_COMMANDS = frozenset({
+    COMM_FW_VERSION,
+    COMM_GET_VALUES,
+    COMM_GET_MCCONF,
+    COMM_GET_APPCONF,
+    COMM_GET_VALUES_SETUP,
+    COMM_GET_VALUES_SETUP_SELECTIVE,
+    COMM_LISP_READ_CODE,
+})
+
+
+@dataclass
+class _Pending:
+    payload: bytes
+    can_id: Optional[int]
+    t: float
+    waiters: List["_BridgeConn"] = field(default_factory=list)
+
+
+class _BridgeConn:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.parser = BLEHelperPy()
+        self.task = asyncio.current_task()
+        peer = writer.get_extra_info("peername") or writer.get_extra_info("sockname")
+        self.name = str(peer)
+
+    def send(self, payload: bytes) -> bool:
+        if self.writer.is_closing():
+            return False
+        if self.writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            self.writer.close()
+            return False
+        self.writer.write(vesc_pack(payload))
+        return True
+
+
+def _target(payload: bytes) -> Tuple[int, Optional[int]]:
+    """
+    (reply COMM ID, CAN ID or None) for a request payload.
+    """
+    if payload[0] == COMM_FORWARD_CAN and len(payload) >= 3:
+        return payload[2], payload[1]
+    return payload[0], None
+
+
+class VescTcpBridge:
+    """
+    Fan one BLE link out to many local clients speaking the standard VESC
+    framed packet protocol over TCP and/or a Unix socket.
+
+      - requests from all clients are multiplexed onto the single link
+      - replies are routed to the client(s) that asked, oldest request first
+        (COMM_GET_VALUES replies are matched on vescId)
+      - identical get-type requests (REPLY_COMMANDS) already in flight are
+        not re-sent; one reply answers every waiter. Anything else is always
+        forwarded, and its replies go to every client
+      - COMM_GET_VALUES requests are answered from the latest sample when it
+        is younger than share_s (e.g. from the client's own poller)
+      - replies nobody asked for (e.g. COMM_PRINT) go to every client
+    """
+
+    def __init__(
+        self,
+        client: "VescBleCanClient",
+        host: Optional[str] = "127.0.0.1",
+        port: int = 65102,
+        unix_path: Optional[str] = None,
+        share_s: float = 0.1,
+        request_timeout_s: float = 2.0,
+    ):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.share_s = share_s
+        self.request_timeout_s = request_timeout_s
+
+        self._conns: Set[_BridgeConn] = set()
+        self._pending: Dict[int, Deque[_Pending]] = {}
+        self._latest_values: Dict[int, Tuple[bytes, float]] = {}
+        self._servers: List[asyncio.AbstractServer] = []
+
+        self.stats = {"requests": 0, "sent": 0, "shared": 0, "replies": 0, "broadcast": 0}
+
+    async def start(self) -> None:
+        self.client.add_payload_listener(self._on_payload)
+
+        if self.host is not None:
+            self._servers.append(await asyncio.start_server(self._handle_conn, self.host, self.port))
+        if self.unix_path:
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+            self._servers.append(await asyncio.start_unix_server(self._handle_conn, self.unix_path))
+
+    async def serve_forever(self) -> None:
+        await asyncio.gather(*(srv.serve_forever() for srv in self._servers))
+
+    async def close(self) -> None:
+        self.client.remove_payload_listener(self._on_payload)
+        for srv in self._servers:
+            srv.close()
+            await srv.wait_closed()
+        self._servers = []
+        # Closing the transport ends each handler's read loop with EOF
+        tasks = [conn.task for conn in self._conns if conn.task]
+        for conn in list(self._conns):
+            conn.writer.close()
+        if tasks:
+            await asyncio.wait(tasks, timeout=1.0)
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+
+    async def _handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = _BridgeConn(reader, writer)
+        self._conns.add(conn)
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                for payload in conn.parser.feed(data):
+                    await self._on_request(conn, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._conns.discard(conn)
+            for q in self._pending.values():
+                for p in q:
+                    if conn in p.waiters:
+                        p.waiters.remove(conn)
+            writer.close()
+
+    async def _on_request(self, conn: _BridgeConn, payload: bytes) -> None:
+        self.stats["requests"] += 1
+        now = time.monotonic()
+        comm_id, can_id = _target(payload)
+
+        if comm_id == COMM_GET_VALUES and can_id is not None:
+            latest = self._latest_values.get(can_id)
+            if latest and now - latest[1] <= self.share_s:
+                self.stats["shared"] += 1
+                conn.send(latest[0])
+                return
+
+        if comm_id not in REPLY_COMMANDS:
+            self.stats["sent"] += 1
+            await self.client.send_payload(payload)
+            return
+
+        q = self._pending.setdefault(comm_id, deque())
+        while q and now - q[0].t > self.request_timeout_s:
+            q.popleft()  # the reply was lost
+
+        for p in q:
+            if p.payload == payload:
+                self.stats["shared"] += 1
+                if conn not in p.waiters:
+                    p.waiters.append(conn)
+                return
+
+        q.append(_Pending(payload, can_id, now, [conn]))
+        self.stats["sent"] += 1
+        await self.client.send_payload(payload)
+
+    def _on_payload(self, payload: bytes) -> None:
+        comm_id = payload[0]
+        now = time.monotonic()
+
+        vesc_id = None
+        if comm_id == COMM_GET_VALUES and len(payload) > GET_VALUES_VESC_ID_OFFSET:
+            vesc_id = payload[GET_VALUES_VESC_ID_OFFSET]
+            self._latest_values[vesc_id] = (payload, now)
+
+        q = self._pending.get(comm_id)
+        match = None
+        if q:
+            if vesc_id is not None:
+                # A request forwarded to this node wins over a local request
+                match = next((p for p in q if p.can_id == vesc_id), None)
+                if match is None:
+                    match = next((p for p in q if p.can_id is None), None)
+            else:
+                match = q[0]
+
+        if match is not None:
+            q.remove(match)
+            self.stats["replies"] += 1
+            for conn in match.waiters:
+                conn.send(payload)
+        elif comm_id != COMM_GET_VALUES:
+            # Unsolicited (e.g. COMM_PRINT) or reply to an expired request
+            self.stats["broadcast"] += 1
+            for conn in list(self._conns):
+                conn.send(payload)
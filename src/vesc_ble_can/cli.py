@@ -1,29 +1,300 @@
 import argparse
-import asyncio
-from typing import List
+import contextlib
+import json
+import sys
+from typing import List, Optional
 
-from .client import VescBleCanClient
+# Keep module-level imports protocol-only: Bleak (via .client) and asyncio are
+# imported by the subcommands that open a BLE connection.
+from .ble_helper import BLEHelperPy
+from .conf_cache import DEFAULT_MAX_AGE_S
+from .config import CAN_END, CAN_START, LISP_CHUNK, LISP_WINDOW
+from .vesc_decode import decode_payload
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="VESC Express BLE->CAN discovery + GET_VALUES polling")
     p.add_argument("--address", default=None, help="BLE address/identifier (macOS uses UUID-like address)")
     p.add_argument("--name", default="STAR-EXP", help="BLE advertised name (default: STAR-EXP)")
     p.add_argument("--scan-seconds", type=float, default=10.0, help="BLE scan duration")
-    p.add_argument("--can-start", type=int, default=1, help="Start CAN ID (inclusive)")
-    p.add_argument("--can-end", type=int, default=50, help="End CAN ID (inclusive)")
+    p.add_argument("--can-start", type=int, default=None,
+                   help="Start CAN ID (inclusive; default 1, soak: first simulated ID)")
+    p.add_argument("--can-end", type=int, default=None,
+                   help="End CAN ID (inclusive; default 50, soak: last simulated ID)")
     p.add_argument("--interval", type=float, default=0.5, help="GET_VALUES polling interval in seconds")
+    p.add_argument("--batch", action="store_true", help="Write each poll cycle as one pre-encoded buffer")
+    p.add_argument("--dashboard", action="store_true",
+                   help="Live table redrawn at --fps (plain rate-capped log when stdout is not a TTY)")
+    p.add_argument("--fps", type=float, default=10.0, help="Dashboard frame rate cap")
+    p.add_argument("--profile", action="store_true",
+                   help="Use the saved link profile for this device (see 'calibrate')")
+    p.add_argument("--adaptive", action="store_true",
+                   help="Adjust the poll interval at runtime when reply loss or latency rises")
+    p.add_argument("--totals", action="store_true",
+                   help="Also poll and print bus-wide totals (COMM_GET_VALUES_SETUP) from the first CAN node")
+    p.add_argument("--totals-interval", type=float, default=None,
+                   help="Totals poll interval (default: --interval)")
+    p.add_argument("--io-thread", action="store_true",
+                   help="Run BLE I/O and polling on a background thread (uvloop when installed)")
+
+    sub = p.add_subparsers(dest="command", metavar="COMMAND")
+
+    d = sub.add_parser("decode", help="Decode captured payloads or framed packets (offline, no BLE)")
+    d.add_argument("hex", nargs="*", help="Hex payloads/packets (reads one per line from stdin if omitted)")
+
+    lp = sub.add_parser("lisp", help="Upload, read back or erase the Lisp script on a CAN node")
+    lp.add_argument("action", choices=["upload", "read", "erase"])
+    lp.add_argument("--can-id", type=int, required=True, help="Target CAN ID")
+    lp.add_argument("--file", default=None, help="Script to upload, or output file for read (default: stdout)")
+    lp.add_argument("--window", type=int, default=LISP_WINDOW, help="Chunks in flight (1 = stop-and-wait)")
+    lp.add_argument("--chunk", type=int, default=LISP_CHUNK, help="Code bytes per chunk")
+    lp.add_argument("--no-verify", action="store_true", help="Skip CRC read-back verification")
+    lp.add_argument("--no-run", action="store_true", help="Do not start the script after upload")
+    lp.add_argument("--compare", action="store_true", help="Also time a stop-and-wait upload for comparison")
+
+    cp = sub.add_parser("config", help="Read (cached) motor/app configuration of a CAN node")
+    cp.add_argument("--can-id", type=int, required=True, help="Target CAN ID")
+    cp.add_argument("--kind", choices=["mcconf", "appconf"], default="mcconf")
+    cp.add_argument("--refresh", action="store_true", help="Ignore the on-disk cache and re-read the node")
+    cp.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE_S,
+                    help=f"Max cache age in seconds (default: {DEFAULT_MAX_AGE_S:.0f})")
+    cp.add_argument("--out", default=None, help="Write the raw configuration blob to this file")
+
+    kp = sub.add_parser("calibrate", help="Measure the link and save a tuned profile for this device")
+    kp.add_argument("--rtt-samples", type=int, default=10, help="Stop-and-wait probes per node")
+    kp.add_argument("--burst", type=int, default=30, help="Requests per pacing step")
+    kp.add_argument("--max-loss", type=float, default=0.02, help="Max reply loss for a pacing step to pass")
+
+    so = sub.add_parser("soak", help="Soak-test discovery and polling against a simulated VESC Express (no BLE)")
+    so.add_argument("--nodes", type=int, default=254, help="Simulated CAN nodes (IDs 1..N)")
+    so.add_argument("--duration", type=float, default=60.0, help="Polling duration in seconds")
+    so.add_argument("--latency-ms", type=float, default=20.0, help="Reply latency")
+    so.add_argument("--jitter-ms", type=float, default=10.0, help="Extra random reply latency (uniform)")
+    so.add_argument("--loss", type=float, default=0.0, help="Probability a request gets no reply")
+    so.add_argument("--corrupt", type=float, default=0.0, help="Probability a reply frame is corrupted")
+    so.add_argument("--notify-size", type=int, default=244, help="Max bytes per notification")
+    so.add_argument("--coalesce-ms", type=float, default=7.5, help="Window for packing replies into one notification")
+    so.add_argument("--pace-ms", type=float, default=30.0, help="TX write pacing per chunk")
+    so.add_argument("--no-discover", action="store_true", help="Poll the simulated IDs without discovery")
+    so.add_argument("--sample-every", type=float, default=5.0, help="RSS/queue sampling period")
+    so.add_argument("--seed", type=int, default=None)
+    so.add_argument("--report", default=None, help="Write the JSON report here (default: stdout)")
+
+    sp = sub.add_parser("serve", help="Share the BLE link with local clients over TCP / Unix socket")
+    sp.add_argument("--host", default="127.0.0.1", help="TCP listen address")
+    sp.add_argument("--port", type=int, default=65102, help="TCP listen port (VESC Tool default: 65102)")
+    sp.add_argument("--no-tcp", action="store_true", help="Only listen on the Unix socket")
+    sp.add_argument("--unix", default=None, help="Also listen on this Unix socket path")
+    sp.add_argument("--poll", action="store_true",
+                    help="Discover nodes and poll GET_VALUES at --interval; clients share these samples")
     return p
 
+def _parse_captured(text: str) -> Optional[bytes]:
+    try:
+        raw = bytes.fromhex(text.replace(":", "").replace(" ", ""))
+    except ValueError:
+        return None
+    if not raw:
+        return None
+
+    # Accept full VESC frames (0x02/0x03 ... 0x03) as well as bare payloads.
+    helper = BLEHelperPy()
+    if raw[0] in (2, 3) and helper.processIncomingBytes(list(raw)) > 0:
+        return helper.getPayload()
+    return raw
+
+def _run_decode(args) -> int:
+    lines = args.hex or [ln.strip() for ln in sys.stdin if ln.strip()]
+    rc = 0
+    for text in lines:
+        payload = _parse_captured(text)
+        out = decode_payload(payload) if payload else None
+        if out is None:
+            print(f"⚠️ Could not decode: {text}", file=sys.stderr)
+            rc = 1
+            continue
+        print(json.dumps(out))
+    return rc
+
+def _use_saved_profile(c, args) -> dict:
+    """
+    Apply the saved link profile (if --profile) and return discovery kwargs.
+    """
+    if not args.profile:
+        return {}
+
+    from .tuning import ProfileStore
+
+    profile = ProfileStore().load(c.device_address or "")
+    if not profile:
+        print("⚠️ No saved link profile for this device; run 'calibrate' first")
+        return {}
+
+    c.apply_link_profile(profile)
+    args.interval = profile.interval_s
+    print(
+        f"Link profile: chunk {profile.chunk_size} B, pace {profile.pace_s * 1000:.0f} ms, "
+        f"poll interval {profile.interval_s * 1000:.0f} ms ({profile.poll_rate_hz:.1f} Hz/node)"
+    )
+    return {"gap_s": profile.gap_s}
+
+async def _amain_calibrate(args) -> int:
+    from .client import VescBleCanClient
+    from .tuning import ProfileStore, calibrate_link
+
+    c = VescBleCanClient(
+        target_name=args.name,
+        scan_seconds=args.scan_seconds,
+        address=args.address,
+    )
+
+    try:
+        await c.connect()
+        nodes = await c.discover_can_nodes(can_start=args.can_start, can_end=args.can_end)
+        if not nodes:
+            print("❌ No CAN nodes found.")
+            return 2
+
+        print(f"Calibrating with CAN {sorted(nodes)} ...")
+        profile = await calibrate_link(
+            c, sorted(nodes),
+            rtt_samples=args.rtt_samples, burst=args.burst, max_loss=args.max_loss,
+        )
+        ProfileStore().save(c.device_address, profile)
+
+        print(
+            f"RTT p50 {profile.rtt_p50_ms:.0f} ms / p95 {profile.rtt_p95_ms:.0f} ms | loss {profile.loss:.1%} | "
+            f"writes {profile.write_rate_hz:.0f}/s\n"
+            f"chunk {profile.chunk_size} B | pace {profile.pace_s * 1000:.0f} ms | "
+            f"poll interval {profile.interval_s * 1000:.0f} ms ({profile.poll_rate_hz:.1f} Hz/node) | "
+            f"initial timeout {profile.per_id_timeout * 1000:.0f} ms\n"
+            f"Saved for {c.device_address}; use --profile to apply."
+        )
+        return 0
+    finally:
+        await c.disconnect()
+
+async def _run_dashboard(c, fps: float) -> None:
+    import asyncio
+    from .dashboard import TelemetryDashboard
+
+    dash = TelemetryDashboard(fps=fps)
+    task = asyncio.create_task(dash.run())
+    try:
+        # get_next_values() returns None once cancelled
+        while True:
+            vals = await c.get_next_values()
+            if vals is None:
+                return
+            dash.update(vals)
+    finally:
+        task.cancel()
+
+async def _print_totals(c) -> None:
+    while True:
+        t = await c.get_next_setup_values()
+        if t is None:
+            return  # cancelled
+        print(
+            f"BUS  {t.get('numVescs', 0):3d} VESCs: "
+            f"Vin={t.get('vIn', 0.0):.1f}V  "
+            f"Iin={t.get('currentInTot', 0.0):.2f}A  "
+            f"P={t.get('currentInTot', 0.0) * t.get('vIn', 0.0):.0f}W  "
+            f"Imotor={t.get('currentTot', 0.0):.2f}A  "
+            f"Ah={t.get('ampHoursTot', 0.0):.3f}  "
+            f"Wh={t.get('wattHoursTot', 0.0):.2f}  "
+            f"Batt={t.get('batteryLevel', 0.0) * 100:.0f}%"
+        )
+
+def _print_values(vals: dict) -> None:
+    vesc_id = vals.get("vescId", -1)
+    print(
+        f"VESC {vesc_id:3d}: "
+        f"Vin={vals['vIn']:.1f}V  "
+        f"RPM={vals['rpm']:.0f}  "
+        f"Duty={vals['dutyNow']:.3f}  "
+        f"Iq={vals['iq']:.2f}A  "
+        f"Id={vals['id']:.2f}A  "
+        f"Iin={vals['currentIn']:.2f}A  "
+        f"Imotor={vals['currentMotor']:.2f}A  "
+        f"Tmos={vals['tempMos']:.1f}C  "
+        f"Tmot={vals['tempMotor']:.1f}C  "
+        f"Fault={vals['faultName']}"
+    )
+
+def _main_io_thread(args) -> int:
+    """
+    Default discover + poll flow with BLE I/O on a background thread; this
+    (main) thread only consumes samples through the synchronous facade.
+    """
+    import time
+    from .io_thread import ThreadedVescClient
+
+    tc = ThreadedVescClient(
+        target_name=args.name,
+        scan_seconds=args.scan_seconds,
+        address=args.address,
+    )
+    tc.start()
+    print(f"I/O thread event loop: {tc.stats()['loop']}")
+
+    try:
+        tc.connect()
+
+        async def use_profile() -> dict:
+            # Touches the client, so it runs on the I/O loop like everything else
+            return _use_saved_profile(tc.client, args)
+
+        disc_kwargs = tc.call(use_profile)
+        info = tc.local_fw_info()
+        if info:
+            print(f"Local FW: {info.fwVersionMajor}.{info.fwVersionMinor} | HW: {info.hardwareName} | UUID: {info.uuid}")
+        else:
+            print("⚠️ Local FW: no response")
+
+        print(f"\nDiscovering CAN IDs {args.can_start}..{args.can_end} ...")
+        nodes = tc.discover_can_nodes(can_start=args.can_start, can_end=args.can_end, **disc_kwargs)
+        if not nodes:
+            print("❌ No CAN nodes found.")
+            return 2
+
+        can_list: List[int] = sorted(nodes.keys())
+        print(f"\nPolling COMM_GET_VALUES on {len(can_list)} node(s) every {args.interval*1000:.0f} ms... (Ctrl+C to stop)\n")
+        tc.start_polling_get_values(can_list, interval_s=args.interval, batch=args.batch, adaptive=args.adaptive)
+
+        next_stats = time.monotonic() + 10.0
+        while True:
+            vals = tc.get_values(timeout=1.0)
+            if vals:
+                _print_values(vals)
+            if time.monotonic() >= next_stats:
+                st = tc.stats()
+                print(
+                    f"-- handoff p99 {st['handoffLatencyMs']['p99']:.1f} ms, "
+                    f"dropped {st['handoffDropped']} | "
+                    f"I/O loop lag p99 {st['ioLoopLagMs']['p99']:.1f} ms"
+                )
+                next_stats += 10.0
+
+    except KeyboardInterrupt:
+        print("\nStopping...")
+        return 0
+    finally:
+        tc.stop()
+
 async def _amain(args) -> int:
+    from .client import VescBleCanClient
+
     c = VescBleCanClient(
     target_name=args.name,
     scan_seconds=args.scan_seconds,
     address=args.address,
     )
+    totals_task = None
 
     try:
         await c.connect()
-        info = await c.local_fw_info(timeout_s=1.0)
+        disc_kwargs = _use_saved_profile(c, args)
+        info = await c.local_fw_info()
         if info:
             print(f"Local FW: {info.fwVersionMajor}.{info.fwVersionMinor} | HW: {info.hardwareName} | UUID: {info.uuid}")
         else:
@@ -33,6 +304,7 @@ async def _amain(args) -> int:
         nodes = await c.discover_can_nodes(
             can_start=args.can_start,
             can_end=args.can_end,
+            **disc_kwargs,
         )
 
         if not nodes:
@@ -46,35 +318,258 @@ async def _amain(args) -> int:
 
         can_list: List[int] = sorted(nodes.keys())
         print(f"\nPolling COMM_GET_VALUES every {args.interval*1000:.0f} ms... (Ctrl+C to stop)\n")
-        await c.start_polling_get_values(can_list, interval_s=args.interval)
+        await c.start_polling_get_values(
+            can_list, interval_s=args.interval, batch=args.batch, adaptive=args.adaptive,
+        )
+        if args.totals:
+            import asyncio
+            await c.start_polling_setup_values(can_list[0], interval_s=args.totals_interval or args.interval)
+            totals_task = asyncio.create_task(_print_totals(c))
+
+        if args.dashboard:
+            await _run_dashboard(c, args.fps)
+            return 0
 
         while True:
             vals = await c.get_next_values()
-            if not vals:
-                continue
-
-            vesc_id = vals.get("vescId", -1)
-            print(
-                f"VESC {vesc_id:3d}: "
-                f"Vin={vals['vIn']:.1f}V  "
-                f"RPM={vals['rpm']:.0f}  "
-                f"Duty={vals['dutyNow']:.3f}  "
-                f"Iq={vals['iq']:.2f}A  "
-                f"Id={vals['id']:.2f}A  "
-                f"Iin={vals['currentIn']:.2f}A  "
-                f"Imotor={vals['currentMotor']:.2f}A  "
-                f"Tmos={vals['tempMos']:.1f}C  "
-                f"Tmot={vals['tempMotor']:.1f}C  "
-                f"Fault={vals['faultName']}"
-            )
+            if vals is None:
+                return 0  # cancelled (Ctrl+C)
+
+            _print_values(vals)
 
     except KeyboardInterrupt:
         print("\nStopping...")
         return 0
+    finally:
+        if totals_task:
+            totals_task.cancel()
+        await c.disconnect()
+
+def _print_transfer(label: str, st, file=None) -> None:
+    print(
+        f"{label}: {st.nbytes} B in {st.seconds:.2f} s "
+        f"({st.throughput_bps:.0f} B/s, {st.chunks} chunks, window {st.window}, "
+        f"{st.retransmits} retransmits)",
+        file=file,
+    )
+
+async def _amain_lisp(args) -> int:
+    from .client import VescBleCanClient
+    from . import lisp
+
+    c = VescBleCanClient(
+        target_name=args.name,
+        scan_seconds=args.scan_seconds,
+        address=args.address,
+    )
+
+    try:
+        if args.action == "read":
+            # stdout carries the code itself; scan/connect messages go to stderr
+            with contextlib.redirect_stdout(sys.stderr):
+                await c.connect()
+        else:
+            await c.connect()
+
+        if args.action == "erase":
+            ok = await lisp.erase_lisp(c, args.can_id)
+            print("✅ Erased" if ok else "❌ Erase failed")
+            return 0 if ok else 1
+
+        if args.action == "read":
+            code, st = await lisp.read_lisp(c, args.can_id, chunk_size=args.chunk, window=args.window)
+            _print_transfer("Read", st, file=sys.stderr)
+            if args.file:
+                with open(args.file, "wb") as f:
+                    f.write(code)
+            else:
+                sys.stdout.write(code.decode(errors="replace"))
+            return 0
+
+        if not args.file:
+            print("❌ upload needs --file")
+            return 2
+        with open(args.file, "rb") as f:
+            code = f.read()
+
+        if args.compare and args.window > 1:
+            base = await lisp.upload_lisp(
+                c, args.can_id, code, chunk_size=args.chunk, window=1,
+                verify=False, run=False,
+            )
+            _print_transfer("Stop-and-wait", base)
+
+        st = await lisp.upload_lisp(
+            c, args.can_id, code, chunk_size=args.chunk, window=args.window,
+            verify=not args.no_verify, run=not args.no_run,
+        )
+        _print_transfer("Upload", st)
+        if args.compare and args.window > 1 and st.seconds > 0:
+            print(f"Speed-up over stop-and-wait: {base.seconds / st.seconds:.2f}x")
+        return 0
+
+    except lisp.LispTransferError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        await c.disconnect()
+
+async def _amain_config(args) -> int:
+    import time
+    from .client import VescBleCanClient
+
+    c = VescBleCanClient(
+        target_name=args.name,
+        scan_seconds=args.scan_seconds,
+        address=args.address,
+    )
+
+    try:
+        await c.connect()
+        t0 = time.monotonic()
+        blob = await c.get_config(args.can_id, args.kind, max_age_s=args.max_age, refresh=args.refresh)
+        if not blob:
+            print(f"❌ No {args.kind} reply from CAN {args.can_id}")
+            return 1
+
+        print(
+            f"{blob.kind} CAN {args.can_id}: {len(blob.data)} B | signature 0x{blob.signature:08X} | "
+            f"crc 0x{blob.crc:04X} | FW {blob.fwVersion} | {blob.hardwareName} | UUID {blob.uuid} | "
+            f"{time.monotonic() - t0:.2f} s"
+        )
+        if args.out:
+            with open(args.out, "wb") as f:
+                f.write(blob.data)
+        return 0
     finally:
         await c.disconnect()
 
+async def _amain_soak(args) -> int:
+    from .soak import SimConfig, SoakConfig, run_soak
+
+    sim = SimConfig(
+        nodes=args.nodes,
+        latency_s=args.latency_ms / 1000.0,
+        jitter_s=args.jitter_ms / 1000.0,
+        loss=args.loss,
+        corrupt=args.corrupt,
+        notify_size=args.notify_size,
+        coalesce_s=args.coalesce_ms / 1000.0,
+        seed=args.seed,
+    )
+    soak = SoakConfig(
+        duration_s=args.duration,
+        interval_s=args.interval,
+        batch=args.batch,
+        adaptive=args.adaptive,
+        pace_s=args.pace_ms / 1000.0,
+        can_start=args.can_start,
+        can_end=args.can_end,
+        discover=not args.no_discover,
+        sample_every_s=args.sample_every,
+    )
+
+    def progress(p: dict) -> None:
+        print(
+            f"[{p['t']:7.1f} s] samples {p['samples']:8d} | RSS {p['rssMb']:6.1f} MB | "
+            f"values q {p['valuesQ']} | tx {p['txPending']} | pending polls {p['pendingPolls']}",
+            file=sys.stderr,
+        )
+
+    report = await run_soak(sim, soak, progress=progress)
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+        t, lat = report["throughput"], report["latencyMs"]
+        print(
+            f"{report['nodes']} nodes | {t['samplesPerS']:.0f} samples/s ({t['perNodeHz']:.2f} Hz/node) | "
+            f"latency p50 {lat['p50']:.0f} / p99 {lat['p99']:.0f} ms | "
+            f"unexplained drops {report['dropped']['unexplained']} | "
+            f"RSS +{report['memory']['rssGrowthMb']:.1f} MB -> {args.report}"
+        )
+    else:
+        print(text)
+    return 0
+
+async def _amain_serve(args) -> int:
+    import asyncio
+    from .bridge import VescTcpBridge
+    from .client import VescBleCanClient
+
+    c = VescBleCanClient(
+        target_name=args.name,
+        scan_seconds=args.scan_seconds,
+        address=args.address,
+    )
+
+    bridge = None
+    try:
+        await c.connect()
+
+        if args.poll:
+            disc_kwargs = _use_saved_profile(c, args)
+            nodes = await c.discover_can_nodes(can_start=args.can_start, can_end=args.can_end, **disc_kwargs)
+            if nodes:
+                await c.start_polling_get_values(
+                    sorted(nodes), interval_s=args.interval, batch=args.batch, adaptive=args.adaptive,
+                )
+            print(f"Sharing GET_VALUES polls for CAN {sorted(nodes)}")
+
+        bridge = VescTcpBridge(
+            c,
+            host=None if args.no_tcp else args.host,
+            port=args.port,
+            unix_path=args.unix,
+            share_s=args.interval if args.poll else 0.1,
+        )
+        await bridge.start()
+        where = [] if args.no_tcp else [f"tcp://{args.host}:{args.port}"]
+        where += [f"unix://{args.unix}"] if args.unix else []
+        print(f"Serving VESC packets on {', '.join(where)} (Ctrl+C to stop)")
+
+        async def drain():
+            # Samples are consumed by bridge clients; keep the local queue empty.
+            # get_next_values() returns None once cancelled.
+            while await c.get_next_values() is not None:
+                pass
+
+        await asyncio.gather(bridge.serve_forever(), drain())
+        return 0
+    finally:
+        if bridge:
+            await bridge.close()
+        await c.disconnect()
+
 def main():
     parser = build_parser()
     args = parser.parse_args()
+    if args.command == "decode":
+        raise SystemExit(_run_decode(args))
+
+    if args.io_thread and (args.command or args.dashboard or args.totals):
+        parser.error("--io-thread only runs the default discover + poll mode (no --dashboard, --totals or commands)")
+    if args.totals and args.dashboard:
+        parser.error("--totals prints its own lines and cannot be combined with --dashboard")
+
+    if args.command != "soak":
+        args.can_start = CAN_START if args.can_start is None else args.can_start
+        args.can_end = CAN_END if args.can_end is None else args.can_end
+
+    import asyncio
+    if args.command == "lisp":
+        raise SystemExit(asyncio.run(_amain_lisp(args)))
+    if args.command == "config":
+        raise SystemExit(asyncio.run(_amain_config(args)))
+    if args.command == "calibrate":
+        raise SystemExit(asyncio.run(_amain_calibrate(args)))
+    if args.command == "soak":
+        raise SystemExit(asyncio.run(_amain_soak(args)))
+    if args.command == "serve":
+        raise SystemExit(asyncio.run(_amain_serve(args)))
+    if args.io_thread:
+        raise SystemExit(_main_io_thread(args))
     raise SystemExit(asyncio.run(_amain(args)))
+
+if __name__ == "__main__":
+    main()
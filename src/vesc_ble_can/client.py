@@ -1,23 +1,48 @@
 import asyncio
+import itertools
+import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Callable, Awaitable
-
-from bleak import BleakClient
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, List, Optional, Callable, Awaitable
 
 from .ble_helper import BLEHelperPy
-from .ble_io import find_device, ble_write_chunked, poll_get_values_periodic
+from .ble_io import BleTxWriter, find_device
+from .command_stream import CommandStream
+from .conf_cache import CONF_COMMANDS, DEFAULT_MAX_AGE_S, ConfigBlob, ConfigCache, decode_config_payload
+from .derived import DerivedMetrics
+from .events import EventEngine, TelemetryEvent, ThresholdRule
+from .rto import TimeoutPolicy
+from .snapshot import PollSnapshot, SnapshotAssembler
+from .tuning import AdaptivePollController, LinkProfile
 from .config import (
+    BLE_CHUNK,
+    DISCOVERY_MIN_TIMEOUT,
     NUS_TX_NOTIFY,
     FW_REQ_EXACT,
+    STREAM_QUEUE_SIZE,
     COMM_FW_VERSION,
     COMM_GET_VALUES,
+    COMM_GET_VALUES_SETUP,
+    COMM_GET_VALUES_SETUP_SELECTIVE,
 )
 from .vesc_decode import (
     FirmwareInfo,
     decode_fw_version_payload,
     decode_get_values_payload_dart_style,
+    decode_get_values_setup_payload,
+    setup_mask,
+)
+from .vesc_packet import (
+    encode_poll_cycle,
+    make_forward_can,
+    make_forward_can_custom_app_data,
+    make_forward_can_fw_req,
+    make_forward_can_get_values,
+    make_get_values_setup,
+    vesc_pack,
 )
-from .vesc_packet import make_forward_can_fw_req
+
+if TYPE_CHECKING:
+    from bleak import BleakClient
 
 
 @dataclass
@@ -32,6 +57,7 @@ class VescBleCanClient:
       - connect to BLE device by address or name (or auto-pick)
       - discover CAN nodes (forward FW_VERSION)
       - poll GET_VALUES periodically
+      - stream latest-wins custom app setpoints per CAN node
     """
 
     def __init__(
@@ -39,71 +65,312 @@ class VescBleCanClient:
         target_name: Optional[str] = None,
         scan_seconds: float = 5.0,
         address: Optional[str] = None,
+        config_cache: Optional[ConfigCache] = None,
     ):
         self.target_name = target_name
         self.address = address
         self.scan_seconds = scan_seconds
+        self.config_cache = config_cache or ConfigCache()
 
         # Always initialize these, so callbacks/cleanup never crash
         self._ble_helper = BLEHelperPy()
 
-        self._client: Optional[BleakClient] = None
+        self._client: Optional["BleakClient"] = None
         self._poll_task: Optional[asyncio.Task] = None
+        self._poll_ctrl: Optional[AdaptivePollController] = None
+        # CAN ID -> [send time, cycle, timed] of unanswered polls, oldest first;
+        # timed is False when only the whole batch buffer's send time is known
+        self._poll_sent: Dict[int, List[list]] = {}
+        self._poll_backoff: Dict[int, int] = {}  # CAN ID -> polls resent since the last clean RTT
+        self._poll_received: Dict[int, int] = {}  # adaptive: open cycle -> replies to it
+        self._setup_task: Optional[asyncio.Task] = None
+        self._setup_sent: Optional[float] = None
+        self._setup_can_id: Optional[int] = None
+        self._tx: Optional[BleTxWriter] = None
+        self._streams: Dict[int, CommandStream] = {}
 
         self._fw_q: asyncio.Queue[bytes] = asyncio.Queue()
-        self._values_q: asyncio.Queue[bytes] = asyncio.Queue()
+        # Published streams keep only the newest items if nobody consumes
+        # them (see _publish); stream_drops counts what was discarded
+        self._values_q: asyncio.Queue[dict] = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._setup_q: asyncio.Queue[dict] = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._derived_q: asyncio.Queue[dict] = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._events_q: asyncio.Queue[TelemetryEvent] = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._snapshots_q: asyncio.Queue[PollSnapshot] = asyncio.Queue(maxsize=32)
+        self.stream_drops = 0
+        self._snapshots = SnapshotAssembler()
+
+        # Replies for other COMM IDs, routed to whoever registered a queue
+        self._reply_qs: Dict[int, asyncio.Queue] = {}
+        self._payload_listeners: List[Callable[[bytes], None]] = []
+
+        # Run once per decoded GET_VALUES sample, in arrival order.
+        self._processors: List[Callable[[dict], None]] = []
+        self._derived: Optional[DerivedMetrics] = None
+        self._events: Optional[EventEngine] = None
+        self._shm = None
 
         self.nodes: Dict[int, FirmwareInfo] = {}
+        self.timeouts = TimeoutPolicy()
+        self.device_address: Optional[str] = None
+        self.link_profile: Optional[LinkProfile] = None
 
     @property
     def is_connected(self) -> bool:
         return bool(self._client and self._client.is_connected)
 
-    async def connect(self) -> None:
-        dev = await find_device(
-            address=self.address,
-            name=self.target_name,
-            timeout_s=self.scan_seconds,
-        )
-        if not dev:
-            raise RuntimeError(
-                f"BLE device not found (address={self.address!r}, name={self.target_name!r})"
+    @property
+    def tx(self) -> Optional[BleTxWriter]:
+        return self._tx
+
+    def mtu_chunk_size(self) -> int:
+        """
+        Largest write that fits the negotiated ATT MTU (BLE_CHUNK if unknown).
+        """
+        mtu = getattr(self._client, "mtu_size", None) if self._client else None
+        if not isinstance(mtu, int) or mtu <= 3:
+            return BLE_CHUNK
+        return max(BLE_CHUNK, mtu - 3)
+
+    def apply_link_profile(self, profile: LinkProfile) -> None:
+        """
+        Use a calibrated (or saved) link profile for chunking, write pacing,
+        poll gaps and the initial request timeout. The poll interval is taken
+        from it by the caller (see the CLI's --profile).
+        """
+        self.link_profile = profile
+        self.timeouts.initial_s = profile.per_id_timeout
+        if self._tx:
+            self._tx.chunk_size = profile.chunk_size
+            self._tx.pace_s = profile.pace_s
+
+    async def connect(self, ble_client=None, settle_s: float = 5.0) -> None:
+        """
+        Scan, connect and start notifications.
+
+        ble_client replaces the scan with an existing BleakClient-compatible
+        object (connect, start_notify, stop_notify, write_gatt_char,
+        disconnect, is_connected), e.g. the simulator in soak.py.
+        """
+        if ble_client is not None:
+            self._client = ble_client
+            self.device_address = getattr(ble_client, "address", None)
+        else:
+            dev = await find_device(
+                address=self.address,
+                name=self.target_name,
+                timeout_s=self.scan_seconds,
             )
+            if not dev:
+                raise RuntimeError(
+                    f"BLE device not found (address={self.address!r}, name={self.target_name!r})"
+                )
+
+            print(f"Selected: {dev.name} [{dev.address}]")
+            self.device_address = dev.address
 
-        print(f"Selected: {dev.name} [{dev.address}]")
+            # Imported here so protocol-only users never pay for Bleak.
+            from bleak import BleakClient
 
-        self._client = BleakClient(dev)
+            self._client = BleakClient(dev)
 
         def on_notify(_, value: bytearray):
             # Defensive: callback can fire at awkward times; never throw here.
             try:
-                n = self._ble_helper.processIncomingBytes(list(value))
-                if n > 0:
-                    payload = self._ble_helper.getPayload()
-                    pkt = payload[0]
-
-                    if pkt == COMM_FW_VERSION:
-                        self._fw_q.put_nowait(payload)
-                    elif pkt == COMM_GET_VALUES:
-                        self._values_q.put_nowait(payload)
-
-                    self._ble_helper.resetPacket()
+                for payload in self._ble_helper.feed(value):
+                    self._dispatch_payload(payload)
             except Exception:
                 # Swallow to avoid crashing Bleak's internal callback loop
-                pass
+                self._ble_helper.resetPacket()
 
         await self._client.connect()
-        await asyncio.sleep(5)
+        await asyncio.sleep(settle_s)
         await self._client.start_notify(NUS_TX_NOTIFY, on_notify)
 
-        # Sanity: local FW request
-        await ble_write_chunked(self._client, FW_REQ_EXACT, without_response=False)
+        self._tx = BleTxWriter(self._client)
+        if self.link_profile:
+            self.apply_link_profile(self.link_profile)
+        self._tx.start()
+
+        # Sanity: local FW request. Wait for the reply, so a discovery started
+        # right after connect() cannot take it for a CAN node's answer.
+        t_sent = await self._tx.write(FW_REQ_EXACT, response=True)
+        try:
+            await asyncio.wait_for(self._fw_q.get(), timeout=1.0)
+            self.timeouts.observe(None, COMM_FW_VERSION, time.monotonic() - t_sent)
+        except asyncio.TimeoutError:
+            pass
+
+    def _dispatch_payload(self, payload: bytes) -> None:
+        for listener in self._payload_listeners:
+            try:
+                listener(payload)
+            except Exception:
+                pass
+
+        pkt = payload[0]
+        if pkt == COMM_FW_VERSION:
+            self._fw_q.put_nowait(payload)
+        elif pkt == COMM_GET_VALUES:
+            self._publish_values(payload)
+        elif pkt in (COMM_GET_VALUES_SETUP, COMM_GET_VALUES_SETUP_SELECTIVE):
+            self._publish_setup_values(payload)
+        elif pkt in self._reply_qs:
+            self._reply_qs[pkt].put_nowait(payload)
+
+    def add_payload_listener(self, listener: Callable[[bytes], None]) -> None:
+        """
+        Register a callable that sees every received payload (all COMM IDs),
+        before it is routed to the client's own queues. It must not block.
+        """
+        self._payload_listeners.append(listener)
+
+    def remove_payload_listener(self, listener: Callable[[bytes], None]) -> None:
+        try:
+            self._payload_listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def _publish_values(self, payload: bytes) -> None:
+        vals = decode_get_values_payload_dart_style(payload)
+        if not vals:
+            return
+
+        vals["_rx_time"] = time.monotonic()
+
+        sent = self._poll_sent.get(vals.get("vescId", -1))
+        if sent:
+            # Older polls well past their timeout were lost, not answered late
+            stale_s = self.timeouts.timeout(vals["vescId"], COMM_GET_VALUES, attempt=1)
+            while len(sent) > 1 and vals["_rx_time"] - sent[0][0] > stale_s:
+                sent.pop(0)
+            t_sent, vals["_cycle"], timed = sent.pop(0)
+            if vals["_cycle"] in self._poll_received:
+                self._poll_received[vals["_cycle"]] += 1
+            # With more than one poll outstanding the reply is ambiguous (Karn)
+            if not sent:
+                self._poll_backoff[vals["vescId"]] = 0
+                if timed:
+                    rtt = vals["_rx_time"] - t_sent
+                    self.timeouts.observe(vals["vescId"], COMM_GET_VALUES, rtt)
+                    if self._poll_ctrl:
+                        self._poll_ctrl.on_rtt(rtt)
+        for proc in self._processors:
+            try:
+                proc(vals)
+            except Exception:
+                # A faulty processor must not stop the sample stream
+                pass
+        self._publish(self._values_q, vals)
+        self._publish(self._snapshots_q, self._snapshots.on_sample(vals))
+
+    def _publish_setup_values(self, payload: bytes) -> None:
+        vals = decode_get_values_setup_payload(payload)
+        if not vals:
+            return
+
+        vals["_rx_time"] = time.monotonic()
+        if self._setup_sent is not None:
+            self.timeouts.observe(self._setup_can_id, payload[0], vals["_rx_time"] - self._setup_sent)
+            self._setup_sent = None
+        self._publish(self._setup_q, vals)
+
+    def _publish(self, q: asyncio.Queue, item) -> None:
+        """
+        Non-blocking put that drops the oldest item when q is full.
+        """
+        if item is None:
+            return
+        if q.full():
+            q.get_nowait()
+            self.stream_drops += 1
+        q.put_nowait(item)
+
+    def add_sample_processor(self, proc: Callable[[dict], None]) -> None:
+        """
+        Register a callable run once per decoded GET_VALUES sample, before
+        the sample reaches get_next_values(). It may add keys to the dict.
+        """
+        self._processors.append(proc)
+
+    def enable_derived_metrics(
+        self,
+        engine: Optional[DerivedMetrics] = None,
+        attach: bool = True,
+    ) -> DerivedMetrics:
+        """
+        Compute derived metrics once per sample in the pipeline.
+
+        attach=True stores them under vals["derived"]; attach=False publishes
+        them (with vescId) on a separate stream read by get_next_derived().
+        """
+        if self._derived is not None:
+            raise RuntimeError("Derived metrics already enabled")
+        self._derived = engine or DerivedMetrics()
+
+        def proc(vals: dict) -> None:
+            out = self._derived.update(vals, vals["_rx_time"])
+            if attach:
+                vals["derived"] = out
+            else:
+                out["vescId"] = vals.get("vescId", -1)
+                self._publish(self._derived_q, out)
+
+        self.add_sample_processor(proc)
+        return self._derived
+
+    def add_event_rules(
+        self,
+        rules: Iterable[ThresholdRule] = (),
+        track_faults: bool = True,
+    ) -> EventEngine:
+        """
+        Evaluate fault transitions and threshold rules once per sample and
+        publish only state changes, read with get_next_event().
+        """
+        if self._events is None:
+            self._events = EventEngine(track_faults=track_faults)
+
+            def proc(vals: dict) -> None:
+                for ev in self._events.process(vals, vals["_rx_time"]):
+                    self._publish(self._events_q, ev)
+
+            self.add_sample_processor(proc)
+
+        self._events.add_rules(rules)
+        return self._events
+
+    def enable_shared_memory(self, name: str = "vesc_ble_can", replace: bool = False):
+        """
+        Publish every decoded sample into a shared-memory latest-value table
+        (one slot per CAN ID) for other local processes; read it with
+        vesc_ble_can.shm_table.TelemetryShmReader(name). An existing table
+        of that name raises FileExistsError unless replace=True.
+        """
+        from .shm_table import TelemetryShmPublisher
+
+        if self._shm is None:
+            self._shm = TelemetryShmPublisher(name, replace=replace)
+            self.add_sample_processor(lambda vals: self._shm and self._shm.publish(vals))
+        return self._shm
 
     async def disconnect(self) -> None:
-        poll_task = self._poll_task
-        if poll_task:
-            poll_task.cancel()
-            self._poll_task = None
+        self.stop_polling()
+
+        streams = list(self._streams.values())
+        self._streams = {}
+        for stream in streams:
+            await stream.close()
+
+        shm = self._shm
+        if shm:
+            self._shm = None
+            shm.close()
+
+        tx = self._tx
+        if tx:
+            self._tx = None
+            await tx.stop()
 
         client = self._client
         if client:
@@ -123,64 +390,366 @@ class VescBleCanClient:
         except asyncio.QueueEmpty:
             pass
 
-    async def local_fw_info(self, timeout_s: float = 1.0) -> Optional[FirmwareInfo]:
-        await self._flush_queue(self._fw_q)
-        try:
-            payload = await asyncio.wait_for(self._fw_q.get(), timeout=timeout_s)
-            return decode_fw_version_payload(payload)
-        except asyncio.TimeoutError:
+    def reply_queue(self, comm_id: int) -> asyncio.Queue:
+        """
+        Queue receiving every reply payload whose first byte is comm_id.
+        """
+        q = self._reply_qs.get(comm_id)
+        if q is None:
+            q = self._reply_qs[comm_id] = asyncio.Queue()
+        return q
+
+    async def send_payload(
+        self,
+        payload: bytes,
+        can_id: Optional[int] = None,
+        priority: bool = False,
+    ) -> float:
+        """
+        Frame and send a raw command payload (payload[0] is the COMM ID),
+        forwarded over CAN when can_id is given. Returns the send timestamp.
+        """
+        if not self._tx:
+            raise RuntimeError("Not connected")
+
+        frame = make_forward_can(can_id, payload) if can_id is not None else vesc_pack(payload)
+        return await self._tx.write(frame, priority=priority)
+
+    async def _round_trip(
+        self,
+        q: asyncio.Queue,
+        frame: bytes,
+        can_id: Optional[int],
+        comm_id: int,
+        decode: Callable[[bytes], Optional[object]],
+        timeout_s: Optional[float],
+        attempts: int,
+        initial_s: Optional[float] = None,
+        min_timeout_s: float = 0.0,
+    ):
+        """
+        Send frame and wait for a reply on q, resending up to attempts times.
+
+        timeout_s=None uses the adaptive per-node/command timeout (at least
+        min_timeout_s) with exponential back-off; only first-attempt replies
+        update the RTT.
+        """
+        if not self._tx:
+            raise RuntimeError("Not connected")
+
+        await self._flush_queue(q)
+        for attempt in range(attempts):
+            if timeout_s is not None:
+                wait = timeout_s
+            else:
+                wait = max(min_timeout_s, self.timeouts.timeout(can_id, comm_id, attempt, initial_s))
+            t_sent = await self._tx.write(frame)
+            try:
+                resp = await asyncio.wait_for(q.get(), timeout=wait)
+            except asyncio.TimeoutError:
+                continue
+            if attempt == 0:
+                self.timeouts.observe(can_id, comm_id, time.monotonic() - t_sent)
+            out = decode(resp)
+            if out:
+                return out
+        return None
+
+    async def local_fw_info(self, timeout_s: Optional[float] = None, retries: int = 3) -> Optional[FirmwareInfo]:
+        """
+        Query COMM_FW_VERSION from the BLE-connected device.
+        """
+        return await self._round_trip(
+            self._fw_q, FW_REQ_EXACT, None, COMM_FW_VERSION, decode_fw_version_payload, timeout_s, retries,
+        )
+
+    async def node_fw_info(
+        self,
+        can_id: int,
+        timeout_s: Optional[float] = None,
+        retries: int = 2,
+        min_timeout_s: float = 0.0,
+    ) -> Optional[FirmwareInfo]:
+        """
+        Query COMM_FW_VERSION from one CAN node (forwarded).
+        """
+        return await self._round_trip(
+            self._fw_q, make_forward_can_fw_req(can_id), can_id, COMM_FW_VERSION,
+            decode_fw_version_payload, timeout_s, retries, min_timeout_s=min_timeout_s,
+        )
+
+    async def get_config(
+        self,
+        can_id: int,
+        kind: str = "mcconf",
+        max_age_s: Optional[float] = DEFAULT_MAX_AGE_S,
+        refresh: bool = False,
+        timeout_s: Optional[float] = None,
+    ) -> Optional[ConfigBlob]:
+        """
+        Fetch the motor ("mcconf") or app ("appconf") configuration of a CAN
+        node, using the on-disk cache keyed by node UUID and CAN ID when
+        possible.
+
+        The cheap check is a COMM_FW_VERSION round trip: a cached blob is
+        reused when UUID, firmware and hardware still match and it is not
+        older than max_age_s (None = no age limit). refresh=True always
+        re-reads the node.
+        timeout_s=None starts from 3 s until the node's reply time is known.
+        """
+        if kind not in CONF_COMMANDS:
+            raise ValueError(f"Unknown config kind {kind!r} (use 'mcconf' or 'appconf')")
+
+        info = await self.node_fw_info(can_id)
+        if info is None:
             return None
 
+        cacheable = info.uuid != "Unknown"
+        if cacheable and not refresh:
+            blob = self.config_cache.load(info.uuid, can_id, kind)
+            if blob and blob.matches(info, can_id) and (max_age_s is None or time.time() - blob.fetchedAt <= max_age_s):
+                return blob
+
+        comm_id = CONF_COMMANDS[kind]
+        blob = await self._round_trip(
+            self.reply_queue(comm_id), make_forward_can(can_id, bytes([comm_id])), can_id, comm_id,
+            lambda payload: decode_config_payload(payload, kind, info, can_id), timeout_s, 2, initial_s=3.0,
+        )
+        if blob and cacheable:
+            self.config_cache.store(blob)
+        return blob
+
     async def discover_can_nodes(
         self,
         can_start: int = 1,
         can_end: int = 50,
-        per_id_timeout: float = 0.20,
+        per_id_timeout: Optional[float] = None,
         retries: int = 2,
         gap_s: float = 0.02,
+        min_timeout_s: float = DISCOVERY_MIN_TIMEOUT,
     ) -> Dict[int, FirmwareInfo]:
+        """
+        Probe each CAN ID with COMM_FW_VERSION. per_id_timeout=None uses the
+        adaptive timeout (absent IDs start from the RTT seen on other nodes),
+        but never less than min_timeout_s.
+
+        A FW_VERSION reply does not say which node sent it, so a slow reply
+        can look like an answer from the next, absent ID. A reply repeating
+        the UUID of a node already found is therefore confirmed with a
+        second probe after late replies had time to land (dual-motor units
+        do report one UUID on two CAN IDs).
+        """
         if not self._client:
             raise RuntimeError("Not connected")
 
         found: Dict[int, FirmwareInfo] = {}
 
         for can_id in range(can_start, can_end + 1):
-            await self._flush_queue(self._fw_q)
-
-            for _ in range(retries):
-                req = make_forward_can_fw_req(can_id)
-                await ble_write_chunked(self._client, req, without_response=True)
-                try:
-                    resp = await asyncio.wait_for(self._fw_q.get(), timeout=per_id_timeout)
-                    info = decode_fw_version_payload(resp)
-                    if info:
-                        found[can_id] = info
-                        break
-                except asyncio.TimeoutError:
-                    pass
+            info = await self.node_fw_info(
+                can_id, timeout_s=per_id_timeout, retries=retries, min_timeout_s=min_timeout_s,
+            )
+            if info and info.uuid != "Unknown" and any(i.uuid == info.uuid for i in found.values()):
+                wait = per_id_timeout if per_id_timeout is not None else max(
+                    min_timeout_s, self.timeouts.timeout(can_id, COMM_FW_VERSION, attempt=1),
+                )
+                await asyncio.sleep(wait)
+                info = await self.node_fw_info(can_id, timeout_s=wait * 2, retries=1)
+            if info:
+                found[can_id] = info
 
             await asyncio.sleep(gap_s)
 
         self.nodes = found
         return found
 
-    async def start_polling_get_values(self, can_ids: List[int], interval_s: float = 0.5) -> None:
+    async def start_polling_get_values(
+        self,
+        can_ids: List[int],
+        interval_s: float = 0.5,
+        batch: bool = False,
+        adaptive: bool = False,
+    ) -> None:
+        """
+        Start the periodic COMM_GET_VALUES poller.
+
+        batch=True writes each cycle as one pre-encoded buffer instead of
+        one paced write per CAN ID. adaptive=True lengthens the interval
+        when reply loss or latency rises and shortens it back toward
+        interval_s while the link is clean.
+
+        Without batch, a node whose previous poll is still unanswered is
+        skipped until that poll's adaptive timeout (backed off on each
+        resend) expires.
+        """
         if not self._client:
             raise RuntimeError("Not connected")
 
         if self._poll_task:
             self._poll_task.cancel()
 
+        self._poll_ctrl = AdaptivePollController(interval_s) if adaptive else None
         self._poll_task = asyncio.create_task(
-            poll_get_values_periodic(self._client, can_ids, interval_s=interval_s)
+            self._poll_loop(can_ids, interval_s=interval_s, batch=batch)
         )
 
+    async def start_polling_setup_values(
+        self,
+        can_id: Optional[int] = None,
+        interval_s: float = 0.5,
+        fields: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Start polling COMM_GET_VALUES_SETUP: one short reply per cycle with
+        bus-wide totals (currentInTot, wattHoursTot, batteryLevel, numVescs,
+        ...) aggregated by the firmware of node can_id (None = the local
+        device). fields limits the reply to those keys via the _SELECTIVE
+        variant. Read samples with get_next_setup_values().
+
+        Runs alongside start_polling_get_values(), e.g. fast totals with a
+        slower per-node detail view.
+        """
+        if not self._client:
+            raise RuntimeError("Not connected")
+
+        if self._setup_task:
+            self._setup_task.cancel()
+
+        req = make_get_values_setup(can_id, setup_mask(fields) if fields is not None else None)
+        self._setup_can_id = can_id
+        self._setup_task = asyncio.create_task(self._setup_poll_loop(req, interval_s))
+
+    def stop_polling(self) -> None:
+        """
+        Stop the GET_VALUES and GET_VALUES_SETUP pollers (if running).
+        """
+        for task in (self._poll_task, self._setup_task):
+            if task:
+                task.cancel()
+        self._poll_task = None
+        self._setup_task = None
+
+    async def _setup_poll_loop(self, req: bytes, interval_s: float) -> None:
+        try:
+            while True:
+                t_sent = await self._tx.write(req)
+                # Only time the reply when no earlier request is outstanding (Karn)
+                self._setup_sent = t_sent if self._setup_sent is None else None
+                await asyncio.sleep(interval_s)
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def poll_interval_s(self) -> Optional[float]:
+        """
+        Current adaptive poll interval (None when not adaptive).
+        """
+        return self._poll_ctrl.interval_s if self._poll_ctrl else None
+
+    async def _poll_loop(self, can_ids: List[int], interval_s: float, batch: bool) -> None:
+        can_ids = list(can_ids)
+        cycle = encode_poll_cycle(can_ids) if batch else None
+        reqs = [(cid, make_forward_can_get_values(cid)) for cid in can_ids]
+        # Frame boundaries inside the batch buffer, where setpoints may cut in
+        frame_ends = list(itertools.accumulate(len(req) for _, req in reqs)) if batch else None
+        gap_s = self.link_profile.poll_gap_s if self.link_profile else 0.01
+        self._poll_sent.clear()
+        self._poll_backoff.clear()
+        self._poll_received.clear()
+        n = 0
+        try:
+            while True:
+                n += 1
+                self._publish(self._snapshots_q, self._snapshots.begin_cycle(n, can_ids, time.monotonic()))
+                sent = 0
+                if self._poll_ctrl:
+                    self._poll_received[n] = 0
+                if cycle is not None:
+                    # Register before writing: replies to the first frames
+                    # arrive while later chunks of the buffer are still queued
+                    t_start = time.monotonic()
+                    entries = [(cid, [t_start, n, False]) for cid in can_ids]
+                    for cid, entry in entries:
+                        self._poll_outstanding(cid, t_start).append(entry)
+                    t_sent = await self._tx.write(
+                        cycle, frame_ends=frame_ends,
+                        chunk_size=max(self._tx.chunk_size, self.mtu_chunk_size()),
+                    )
+                    for _, entry in entries:
+                        entry[0] = t_sent
+                    sent = len(can_ids)
+                else:
+                    for cid, req in reqs:
+                        pending = self._poll_outstanding(cid, time.monotonic())
+                        if pending:
+                            backoff = self._poll_backoff.get(cid, 0)
+                            if time.monotonic() - pending[-1][0] < self.timeouts.timeout(cid, COMM_GET_VALUES, backoff):
+                                # Last poll still within its (backed-off) timeout
+                                self._publish(self._snapshots_q, self._snapshots.skip(cid))
+                                continue
+                            self._poll_backoff[cid] = backoff + 1
+                        pending.append([await self._tx.write(req), n, True])
+                        sent += 1
+                        if gap_s:
+                            await asyncio.sleep(gap_s)
+
+                if self._poll_ctrl:
+                    await asyncio.sleep(self._poll_ctrl.interval_s)
+                    # Replies to this cycle still missing after the interval count as lost
+                    self._poll_ctrl.on_cycle(sent, self._poll_received.pop(n, 0))
+                else:
+                    await asyncio.sleep(interval_s)
+        except asyncio.CancelledError:
+            pass
+
+    def _poll_outstanding(self, can_id: int, now: float) -> List[list]:
+        pending = self._poll_sent.setdefault(can_id, [])
+        # Replies this old are not coming any more
+        while pending and now - pending[0][0] > self.timeouts.max_s * 2:
+            pending.pop(0)
+        return pending
+
     async def get_next_values(self) -> Optional[dict]:
         try:
-            payload = await self._values_q.get()
+            return await self._values_q.get()
+        except asyncio.CancelledError:
+            return None
+
+    async def get_next_setup_values(self) -> Optional[dict]:
+        try:
+            return await self._setup_q.get()
+        except asyncio.CancelledError:
+            return None
+
+    async def next_snapshot(self) -> Optional[PollSnapshot]:
+        """
+        Next per-cycle snapshot of all polled nodes (see PollSnapshot).
+        """
+        try:
+            return await self._snapshots_q.get()
+        except asyncio.CancelledError:
+            return None
+
+    async def snapshots(self) -> AsyncIterator[PollSnapshot]:
+        """
+        async for snap in client.snapshots(): ...
+        """
+        while True:
+            snap = await self.next_snapshot()
+            if snap is None:
+                return
+            yield snap
+
+    async def get_next_derived(self) -> Optional[dict]:
+        try:
+            return await self._derived_q.get()
+        except asyncio.CancelledError:
+            return None
+
+    async def get_next_event(self) -> Optional[TelemetryEvent]:
+        try:
+            return await self._events_q.get()
         except asyncio.CancelledError:
             return None
-        return decode_get_values_payload_dart_style(payload)
 
     async def run_values_loop(self, on_values: Callable[[dict], Awaitable[None]]) -> None:
         while True:
@@ -188,28 +757,32 @@ class VescBleCanClient:
             if vals:
                 await on_values(vals)
 
-    async def send_custom_app_data_can(self, can_id: int, value: int):
+    def command_stream(self, can_id: int, max_rate_hz: float = 50.0) -> CommandStream:
         """
-        Send COMM_CUSTOM_APP_DATA to a CAN node via VESC Express.
+        Get (or create) the latest-wins setpoint stream for a CAN node.
 
-        Payload format matches Flutter:
-        [0x01, value]
+        stream.set(value) never blocks; stale values are dropped in favour of
+        the newest one and frames are sent ahead of telemetry polls.
         """
-        if not self._client or not self._client.is_connected:
-            raise RuntimeError("BLE client not connected")
-
-        from .vesc_packet import make_forward_can_custom_app_data
-        from .ble_io import ble_write_chunked
+        if not self._tx:
+            raise RuntimeError("Not connected")
 
-        payload = bytes([value])
-        pkt = make_forward_can_custom_app_data(can_id, payload)
+        stream = self._streams.get(can_id)
+        if stream is None:
+            stream = CommandStream(self._tx, can_id, max_rate_hz=max_rate_hz)
+            stream.start()
+            self._streams[can_id] = stream
+        return stream
 
-        # Strong debug proof (keep for now)
-        print(f"[TX] CAN {can_id} CUSTOM_APP_DATA → {pkt.hex()}")
+    async def send_custom_app_data_can(self, can_id: int, value: int):
+        """
+        Send COMM_CUSTOM_APP_DATA to a CAN node via VESC Express.
 
-        await ble_write_chunked(
-            self._client,
-            pkt,
-            without_response=True,
-        )
+        Payload is a single byte [value]. Each call is sent in order; use
+        command_stream() for high-rate setpoints.
+        """
+        if not self._client or not self._client.is_connected or not self._tx:
+            raise RuntimeError("BLE client not connected")
 
+        pkt = make_forward_can_custom_app_data(can_id, bytes([value]))
+        await self._tx.write(pkt, priority=True)
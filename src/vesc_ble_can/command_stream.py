@@ -0,0 +1,105 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+from .ble_io import BleTxWriter
+from .vesc_packet import make_forward_can_custom_app_data
+
+
+@dataclass
+class CommandStreamStats:
+    submitted: int = 0
+    sent: int = 0
+    coalesced: int = 0  # values overwritten before they were sent
+    errors: int = 0
+    last_latency_ms: float = 0.0
+    avg_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+
+class CommandStream:
+    """
+    Latest-wins COMM_CUSTOM_APP_DATA setpoint stream for one CAN node.
+
+    set() never blocks and may be called at any rate. Only the newest unsent
+    payload per channel is kept; a background task sends at most max_rate_hz
+    frames per channel, ahead of queued telemetry requests.
+
+    Channels are coalescing keys only: the payload is sent as given, so the
+    reference Lisp listener (single command byte) works with channel 0.
+    """
+
+    def __init__(self, tx: BleTxWriter, can_id: int, max_rate_hz: float = 50.0):
+        if max_rate_hz <= 0:
+            raise ValueError("max_rate_hz must be > 0")
+
+        self.can_id = can_id
+        self.max_rate_hz = max_rate_hz
+        self.stats = CommandStreamStats()
+
+        self._tx = tx
+        self._pending: Dict[int, Tuple[bytes, float]] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._last_send = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        task = self._task
+        self._task = None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def set(self, value: Union[int, bytes], channel: int = 0) -> None:
+        """
+        Submit a setpoint. int values are sent as a single byte.
+        """
+        payload = bytes([value & 0xFF]) if isinstance(value, int) else bytes(value)
+
+        if channel in self._pending:
+            self.stats.coalesced += 1
+        self._pending[channel] = (payload, time.monotonic())
+        self.stats.submitted += 1
+        self._wake.set()
+
+    async def _run(self) -> None:
+        min_period = 1.0 / self.max_rate_hz
+        while True:
+            if not self._pending:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            wait = self._last_send + min_period - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            batch, self._pending = self._pending, {}
+            self._last_send = time.monotonic()
+
+            for payload, t_set in batch.values():
+                pkt = make_forward_can_custom_app_data(self.can_id, payload)
+                try:
+                    t_sent = await self._tx.write(pkt, priority=True)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self.stats.errors += 1
+                    continue
+                self._record_latency((t_sent - t_set) * 1000.0)
+
+    def _record_latency(self, ms: float) -> None:
+        st = self.stats
+        st.sent += 1
+        st.last_latency_ms = ms
+        st.avg_latency_ms += (ms - st.avg_latency_ms) / st.sent
+        if ms > st.max_latency_ms:
+            st.max_latency_ms = ms
@@ -0,0 +1,124 @@
+import json
+import os
+import struct
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from .config import COMM_GET_APPCONF, COMM_GET_MCCONF
+from .vesc_crc import crc16_ccitt_init0
+from .vesc_decode import FirmwareInfo
+
+CONF_COMMANDS = {
+    "mcconf": COMM_GET_MCCONF,
+    "appconf": COMM_GET_APPCONF,
+}
+
+# The firmware has no cheap "configuration changed" check, so cached blobs
+# are re-read after this long (changes made in VESC Tool show up then).
+DEFAULT_MAX_AGE_S = 3600.0
+
+
+@dataclass
+class ConfigBlob:
+    """
+    A serialized motor (mcconf) or app (appconf) configuration.
+
+    data is the reply payload without the COMM ID. Its layout depends on the
+    firmware version; signature (the first uint32) identifies that layout.
+    canId is part of the identity: dual-motor hardware reports one UUID on
+    two CAN IDs with a different mcconf each.
+    """
+
+    kind: str
+    uuid: str
+    canId: int
+    fwVersion: str
+    hardwareName: str
+    signature: int
+    crc: int
+    data: bytes
+    fetchedAt: float
+
+    def matches(self, info: FirmwareInfo, can_id: int) -> bool:
+        return (
+            self.uuid == info.uuid
+            and self.canId == can_id
+            and self.fwVersion == _fw_str(info)
+            and self.hardwareName == info.hardwareName
+        )
+
+
+def _fw_str(info: FirmwareInfo) -> str:
+    return f"{info.fwVersionMajor}.{info.fwVersionMinor}"
+
+
+def decode_config_payload(payload: bytes, kind: str, info: FirmwareInfo, can_id: int) -> Optional[ConfigBlob]:
+    if kind not in CONF_COMMANDS:
+        raise ValueError(f"Unknown config kind {kind!r} (use 'mcconf' or 'appconf')")
+    if len(payload) < 5 or payload[0] != CONF_COMMANDS[kind]:
+        return None
+
+    data = bytes(payload[1:])
+    return ConfigBlob(
+        kind=kind,
+        uuid=info.uuid,
+        canId=can_id,
+        fwVersion=_fw_str(info),
+        hardwareName=info.hardwareName,
+        signature=struct.unpack_from(">I", data, 0)[0],
+        crc=crc16_ccitt_init0(data),
+        data=data,
+        fetchedAt=time.time(),
+    )
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "vesc-ble-can", "config")
+
+
+class ConfigCache:
+    """
+    On-disk cache of configuration blobs, one JSON file per
+    (node UUID, CAN ID, kind).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_cache_dir()
+
+    def _file(self, uuid: str, can_id: int, kind: str) -> str:
+        safe = "".join(ch for ch in uuid if ch.isalnum()) or "unknown"
+        return os.path.join(self.path, f"{safe}_{can_id}_{kind}.json")
+
+    def load(self, uuid: str, can_id: int, kind: str) -> Optional[ConfigBlob]:
+        try:
+            with open(self._file(uuid, can_id, kind), "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            raw["data"] = bytes.fromhex(raw["data"])
+            blob = ConfigBlob(**raw)
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+        # Reject files that were truncated or edited by hand
+        if crc16_ccitt_init0(blob.data) != blob.crc:
+            return None
+        return blob
+
+    def store(self, blob: ConfigBlob) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        raw = asdict(blob)
+        raw["data"] = blob.data.hex()
+
+        dst = self._file(blob.uuid, blob.canId, blob.kind)
+        tmp = dst + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(raw, f)
+        os.replace(tmp, dst)
+
+    def invalidate(self, uuid: str, can_id: int, kind: Optional[str] = None) -> None:
+        for k in ([kind] if kind else list(CONF_COMMANDS)):
+            try:
+                os.remove(self._file(uuid, can_id, k))
+            except OSError:
+                pass
@@ -13,21 +13,46 @@ BLE_CHUNK = 20
 # COMM IDs (your enum ordering)
 COMM_FW_VERSION  = 0
 COMM_GET_VALUES  = 4
+COMM_GET_MCCONF  = 14
+COMM_GET_APPCONF = 17
 COMM_FORWARD_CAN = 34
 COMM_CUSTOM_APP_DATA = 36
+COMM_GET_VALUES_SETUP = 47
+COMM_GET_VALUES_SETUP_SELECTIVE = 51
+COMM_LISP_READ_CODE   = 129
+COMM_LISP_WRITE_CODE  = 130
+COMM_LISP_ERASE_CODE  = 131
+COMM_LISP_SET_RUNNING = 132
 
 COMM_NAMES = {
     0: "COMM_FW_VERSION",
     4: "COMM_GET_VALUES",
+    14: "COMM_GET_MCCONF",
+    17: "COMM_GET_APPCONF",
     34: "COMM_FORWARD_CAN",
+    36: "COMM_CUSTOM_APP_DATA",
+    47: "COMM_GET_VALUES_SETUP",
+    51: "COMM_GET_VALUES_SETUP_SELECTIVE",
+    129: "COMM_LISP_READ_CODE",
+    130: "COMM_LISP_WRITE_CODE",
+    131: "COMM_LISP_ERASE_CODE",
+    132: "COMM_LISP_SET_RUNNING",
 }
 
 # EXACT local FW request (works with your device)
 FW_REQ_EXACT = bytes([0x02, 0x01, 0x00, 0x00, 0x00, 0x03])
 
+# Lisp bulk transfer defaults
+LISP_CHUNK = 128     # code bytes per COMM_LISP_WRITE_CODE / READ_CODE
+LISP_WINDOW = 4      # chunks in flight
+
+# Items kept per published stream (values, setup, events) with no consumer
+STREAM_QUEUE_SIZE = 1024
+
 # CAN scan defaults
 CAN_START = 1
 CAN_END   = 50       # bump to 254 if needed
 PER_ID_TIMEOUT = 0.10
+DISCOVERY_MIN_TIMEOUT = 0.20  # FW_VERSION replies carry no CAN ID; wait out slow ones
 RETRIES = 2
 GAP = 0.02
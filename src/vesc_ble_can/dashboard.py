@@ -0,0 +1,130 @@
+import asyncio
+import sys
+from typing import Dict, List, Optional, TextIO, Tuple
+
+# (key, header, width, format)
+COLUMNS: List[Tuple[str, str, int, str]] = [
+    ("vescId", "VESC", 5, "{:d}"),
+    ("vIn", "Vin[V]", 8, "{:.1f}"),
+    ("rpm", "RPM", 8, "{:.0f}"),
+    ("dutyNow", "Duty", 7, "{:.3f}"),
+    ("iq", "Iq[A]", 8, "{:.2f}"),
+    ("id", "Id[A]", 8, "{:.2f}"),
+    ("currentIn", "Iin[A]", 8, "{:.2f}"),
+    ("currentMotor", "Imot[A]", 8, "{:.2f}"),
+    ("tempMos", "Tmos[C]", 8, "{:.1f}"),
+    ("tempMotor", "Tmot[C]", 8, "{:.1f}"),
+    ("faultName", "Fault", 34, "{}"),
+]
+
+CSI = "\x1b["
+
+
+def _cell(vals: dict, key: str, width: int, fmt: str) -> str:
+    v = vals.get(key)
+    text = "-" if v is None else fmt.format(v)
+    return text[:width].rjust(width) if key != "faultName" else text[:width].ljust(width)
+
+
+class TelemetryDashboard:
+    """
+    Live telemetry view decoupled from the sample rate.
+
+    update() only stores the latest sample per CAN node. run() redraws at
+    most fps times per second with one stdout write per frame:
+      - TTY: a table where only changed cells are rewritten via ANSI cursor moves
+      - otherwise: plain log lines, at most one per node per frame
+    """
+
+    def __init__(self, out: Optional[TextIO] = None, fps: float = 10.0, tty: Optional[bool] = None):
+        if fps <= 0:
+            raise ValueError("fps must be > 0")
+
+        self.out = out or sys.stdout
+        self.fps = fps
+        self.tty = self.out.isatty() if tty is None else tty
+
+        self._latest: Dict[int, dict] = {}
+        self._dirty: Dict[int, bool] = {}
+        self._rows: List[int] = []                    # CAN IDs in display order
+        self._shown: Dict[Tuple[int, int], str] = {}  # (row, col index) -> text on screen
+        self.frames = 0
+
+    def update(self, vals: dict) -> None:
+        vesc_id = vals.get("vescId", -1)
+        self._latest[vesc_id] = vals
+        self._dirty[vesc_id] = True
+
+    def render(self) -> str:
+        """
+        Build the next frame (possibly empty) as one string.
+        """
+        if self.tty:
+            return self._render_tty()
+        return self._render_plain()
+
+    def _render_plain(self) -> str:
+        lines = []
+        for vesc_id in sorted(self._dirty):
+            vals = self._latest[vesc_id]
+            lines.append("  ".join(
+                f"{hdr}={_cell(vals, key, width, fmt).strip()}" for key, hdr, width, fmt in COLUMNS
+            ))
+        self._dirty.clear()
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _render_tty(self) -> str:
+        parts: List[str] = []
+        rows = sorted(self._latest)
+        full = rows != self._rows
+
+        if full:
+            # Node set changed: full redraw
+            self._rows = rows
+            self._shown.clear()
+            parts.append(f"{CSI}?25l{CSI}2J{CSI}H")
+            parts.append(" ".join(hdr.rjust(width) if key != "faultName" else hdr.ljust(width)
+                                  for key, hdr, width, _ in COLUMNS))
+
+        for r, vesc_id in enumerate(rows):
+            if not full and not self._dirty.get(vesc_id):
+                continue
+            vals = self._latest[vesc_id]
+            col = 1
+            for c, (key, _, width, fmt) in enumerate(COLUMNS):
+                text = _cell(vals, key, width, fmt)
+                if self._shown.get((r, c)) != text:
+                    self._shown[(r, c)] = text
+                    parts.append(f"{CSI}{r + 2};{col}H{text}")
+                col += width + 1
+
+        self._dirty.clear()
+        if parts:
+            parts.append(f"{CSI}{len(rows) + 2};1H")
+        return "".join(parts)
+
+    def draw(self) -> None:
+        frame = self.render()
+        if frame:
+            self.out.write(frame)
+            self.out.flush()
+            self.frames += 1
+
+    def close(self) -> None:
+        if self.tty:
+            self.out.write(f"{CSI}{len(self._rows) + 2};1H{CSI}?25h\n")
+            self.out.flush()
+
+    async def run(self, stop_event: Optional[asyncio.Event] = None) -> None:
+        period = 1.0 / self.fps
+        loop = asyncio.get_running_loop()
+        try:
+            next_t = loop.time()
+            while stop_event is None or not stop_event.is_set():
+                self.draw()
+                # Skip missed frames rather than bursting after a stall
+                next_t = max(next_t + period, loop.time())
+                await asyncio.sleep(next_t - loop.time())
+        finally:
+            self.draw()
+            self.close()
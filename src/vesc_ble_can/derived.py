@@ -0,0 +1,149 @@
+import math
+from typing import Dict, Iterable, List, Optional, Union
+
+# Source keys (from decode_get_values_payload_dart_style) tracked by default,
+# plus "power", which is derived from vIn * currentIn.
+DEFAULT_TRACKED = ("power", "currentIn", "rpm", "vIn")
+
+
+class _Stat:
+    """
+    O(1) running statistics for one signal on one node:
+    EMA, fixed-window mean, Welford mean/variance and rate of change.
+    """
+
+    __slots__ = ("ema", "ring", "idx", "full", "wsum", "n", "mean", "m2", "prev", "prev_t")
+
+    def __init__(self, window: int):
+        self.ema: Optional[float] = None
+        self.ring: List[float] = [0.0] * window
+        self.idx = 0
+        self.full = False
+        self.wsum = 0.0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.prev: Optional[float] = None
+        self.prev_t: Optional[float] = None
+
+    def update(self, x: float, t: float, alpha: float) -> tuple:
+        # Exponential moving average
+        self.ema = x if self.ema is None else self.ema + alpha * (x - self.ema)
+
+        # Fixed window mean via running sum; re-summed once per wrap so
+        # floating-point drift cannot accumulate (amortised O(1)).
+        ring = self.ring
+        self.wsum += x - ring[self.idx]
+        ring[self.idx] = x
+        self.idx += 1
+        if self.idx == len(ring):
+            self.idx = 0
+            self.full = True
+            self.wsum = math.fsum(ring)
+        count = len(ring) if self.full else self.idx
+
+        # Welford running mean / variance
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        var = self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+        # Rate of change (units per second)
+        rate = 0.0
+        if self.prev is not None and t > self.prev_t:
+            rate = (x - self.prev) / (t - self.prev_t)
+        self.prev = x
+        self.prev_t = t
+
+        return self.ema, self.wsum / count, var, rate
+
+
+class _NodeState:
+    __slots__ = ("stats", "wh0", "whc0", "prev_wh", "prev_whc")
+
+    def __init__(self, keys: Iterable[str], window: int):
+        self.stats: Dict[str, _Stat] = {k: _Stat(window) for k in keys}
+        self.wh0: Optional[float] = None
+        self.whc0: Optional[float] = None
+        self.prev_wh = 0.0
+        self.prev_whc = 0.0
+
+
+class DerivedMetrics:
+    """
+    Incremental derived-metrics engine over COMM_GET_VALUES samples.
+
+    Keeps independent O(1)-per-sample state for every CAN node (keyed by
+    vescId) and returns, per sample:
+      - powerW:      vIn * currentIn
+      - motorRpm:    rpm (electrical) / pole pairs
+      - dWh, dWhCharged: energy deltas since the previous sample
+      - energyWh:    net energy since the first sample (used - charged)
+      - <key>Ema / <key>Avg / <key>Var / <key>Rate for each tracked key
+    """
+
+    def __init__(
+        self,
+        pole_pairs: Union[int, Dict[int, int]] = 1,
+        window: int = 20,
+        ema_alpha: float = 0.2,
+        tracked: Iterable[str] = DEFAULT_TRACKED,
+    ):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        if not 0.0 < ema_alpha <= 1.0:
+            raise ValueError("ema_alpha must be in (0, 1]")
+
+        self.pole_pairs = pole_pairs
+        self.window = window
+        self.ema_alpha = ema_alpha
+        self.tracked = tuple(tracked)
+
+        self._nodes: Dict[int, _NodeState] = {}
+
+    def reset(self, vesc_id: Optional[int] = None) -> None:
+        if vesc_id is None:
+            self._nodes.clear()
+        else:
+            self._nodes.pop(vesc_id, None)
+
+    def _pole_pairs_for(self, vesc_id: int) -> int:
+        pp = self.pole_pairs
+        if isinstance(pp, dict):
+            pp = pp.get(vesc_id, 1)
+        return pp or 1
+
+    def update(self, sample: dict, t: float) -> dict:
+        vesc_id = sample.get("vescId", -1)
+        st = self._nodes.get(vesc_id)
+        if st is None:
+            st = self._nodes[vesc_id] = _NodeState(self.tracked, self.window)
+
+        out = {}
+        power = sample["vIn"] * sample["currentIn"]
+        out["powerW"] = power
+        out["motorRpm"] = sample["rpm"] / self._pole_pairs_for(vesc_id)
+
+        wh = sample["wattHours"]
+        whc = sample["wattHoursCharged"]
+        if st.wh0 is None:
+            st.wh0, st.whc0 = wh, whc
+            st.prev_wh, st.prev_whc = wh, whc
+        out["dWh"] = wh - st.prev_wh
+        out["dWhCharged"] = whc - st.prev_whc
+        out["energyWh"] = (wh - st.wh0) - (whc - st.whc0)
+        st.prev_wh, st.prev_whc = wh, whc
+
+        alpha = self.ema_alpha
+        for key, stat in st.stats.items():
+            x = power if key == "power" else sample.get(key)
+            if x is None:
+                continue
+            ema, avg, var, rate = stat.update(float(x), t, alpha)
+            out[key + "Ema"] = ema
+            out[key + "Avg"] = avg
+            out[key + "Var"] = var
+            out[key + "Rate"] = rate
+
+        return out
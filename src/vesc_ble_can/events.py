@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .vesc_decode import MC_FAULT_NAMES
+
+
+@dataclass
+class TelemetryEvent:
+    kind: str      # "fault" or "threshold"
+    vescId: int
+    name: str      # fault name or rule name
+    active: bool   # True when raised, False when cleared
+    value: float
+    t: float
+
+
+@dataclass
+class ThresholdRule:
+    """
+    Raise when `key op threshold` holds continuously for hold_s seconds;
+    clear when the value is back past threshold -/+ hysteresis for hold_s.
+
+    Example: ThresholdRule("mosHot", "tempMos", ">", 80.0, hold_s=0.5, hysteresis=5.0)
+    """
+
+    name: str
+    key: str
+    op: str
+    threshold: float
+    hold_s: float = 0.0
+    hysteresis: float = 0.0
+
+    def __post_init__(self):
+        if self.op not in (">", "<"):
+            raise ValueError(f"Unsupported op {self.op!r} (use '>' or '<')")
+        if self.hysteresis < 0:
+            raise ValueError("hysteresis must be >= 0")
+
+    def raised(self, x: float) -> bool:
+        return x > self.threshold if self.op == ">" else x < self.threshold
+
+    def cleared(self, x: float) -> bool:
+        if self.op == ">":
+            return x < self.threshold - self.hysteresis
+        return x > self.threshold + self.hysteresis
+
+
+@dataclass
+class _RuleState:
+    active: bool = False
+    since: Optional[float] = None  # when the pending transition started
+
+
+class EventEngine:
+    """
+    Edge-triggered evaluation of fault transitions and threshold rules.
+
+    process() is called once per sample and returns only state changes, so
+    subscribers see a low-volume stream instead of every sample.
+    """
+
+    def __init__(self, rules: Iterable[ThresholdRule] = (), track_faults: bool = True):
+        self.rules: List[ThresholdRule] = list(rules)
+        self.track_faults = track_faults
+
+        self._faults: Dict[int, int] = {}
+        self._states: Dict[Tuple[int, str], _RuleState] = {}
+
+    def add_rules(self, rules: Iterable[ThresholdRule]) -> None:
+        self.rules.extend(rules)
+
+    def process(self, sample: dict, t: float) -> List[TelemetryEvent]:
+        vesc_id = sample.get("vescId", -1)
+        events: List[TelemetryEvent] = []
+
+        if self.track_faults and "faultCode" in sample:
+            code = sample["faultCode"]
+            prev = self._faults.get(vesc_id, 0)
+            if code != prev:
+                self._faults[vesc_id] = code
+                if prev != 0:
+                    events.append(TelemetryEvent("fault", vesc_id, _fault_name(prev), False, prev, t))
+                if code != 0:
+                    events.append(TelemetryEvent("fault", vesc_id, _fault_name(code), True, code, t))
+
+        for rule in self.rules:
+            x = sample.get(rule.key)
+            if x is None:
+                continue
+
+            st = self._states.get((vesc_id, rule.name))
+            if st is None:
+                st = self._states[(vesc_id, rule.name)] = _RuleState()
+
+            toward = rule.cleared(x) if st.active else rule.raised(x)
+            if not toward:
+                st.since = None
+                continue
+
+            if st.since is None:
+                st.since = t
+            if t - st.since >= rule.hold_s:
+                st.active = not st.active
+                st.since = None
+                events.append(TelemetryEvent("threshold", vesc_id, rule.name, st.active, x, t))
+
+        return events
+
+
+def _fault_name(code: int) -> str:
+    return MC_FAULT_NAMES.get(code, f"FAULT_CODE[{code}]")
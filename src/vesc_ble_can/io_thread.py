@@ -0,0 +1,294 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .stats import dist_ms, watch_loop_lag
+
+if TYPE_CHECKING:
+    from .client import VescBleCanClient
+
+
+def new_io_loop(use_uvloop: bool = True) -> asyncio.AbstractEventLoop:
+    """
+    Event loop for the I/O thread: uvloop when installed, else asyncio's.
+    """
+    if use_uvloop:
+        try:
+            import uvloop
+            return uvloop.new_event_loop()
+        except ImportError:
+            pass
+    return asyncio.new_event_loop()
+
+
+def _wake(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class SampleHandoff:
+    """
+    Bounded, thread-safe FIFO from the I/O thread to the application.
+
+    put() never blocks the producer: when full, the oldest item is dropped
+    (and counted). Consumers take items with get() from any thread or
+    get_async() from any event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024, keep_latencies: int = 2048):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        self.maxsize = maxsize
+        self._items: Deque[Tuple[float, Any]] = deque()
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+        self.put_count = 0
+        self.dropped = 0
+        self.latencies: Deque[float] = deque(maxlen=keep_latencies)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any) -> None:
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append((time.monotonic(), item))
+            self.put_count += 1
+            self._cond.notify()
+            waiters, self._waiters = self._waiters, []
+
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, fut)
+            except RuntimeError:
+                pass  # that loop is closed
+
+    def _take(self) -> Any:
+        t, item = self._items.popleft()
+        self.latencies.append(time.monotonic() - t)
+        return item
+
+    def get_nowait(self) -> Optional[Any]:
+        with self._cond:
+            return self._take() if self._items else None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Blocking take; None on timeout.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            return self._take()
+
+    async def get_async(self) -> Any:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._items:
+                    return self._take()
+                fut = loop.create_future()
+                self._waiters.append((loop, fut))
+            await fut
+
+
+class ThreadedVescClient:
+    """
+    Runs VescBleCanClient (Bleak notifications, parser, poller, TX writer) on
+    a dedicated thread with its own event loop, so slow application code
+    cannot delay BLE handling or the poll schedule.
+
+    Decoded GET_VALUES samples cross over through a bounded SampleHandoff:
+      - async code: await get_next_values() / run_values_loop()
+      - sync code:  get_values(timeout), or latest(can_id) which never blocks
+
+    Other client calls run on the I/O loop via call() (blocking) or
+    call_async(); the common ones have sync wrappers below. On Windows,
+    Bleak in a non-main thread may need bleak's allow_sta() workaround.
+    """
+
+    def __init__(
+        self,
+        target_name: Optional[str] = None,
+        scan_seconds: float = 5.0,
+        address: Optional[str] = None,
+        handoff_size: int = 1024,
+        use_uvloop: bool = True,
+        lag_period_s: float = 0.05,
+        **client_kwargs,
+    ):
+        self._client_args = dict(target_name=target_name, scan_seconds=scan_seconds, address=address, **client_kwargs)
+        self.handoff = SampleHandoff(handoff_size)
+        self.use_uvloop = use_uvloop
+        self.lag_period_s = lag_period_s
+
+        self.client: Optional["VescBleCanClient"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self._latest: Dict[int, dict] = {}
+        self._lags: Deque[float] = deque(maxlen=2048)
+
+    # --- lifecycle -------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread:
+            return
+
+        ready = threading.Event()
+
+        def run() -> None:
+            loop = new_io_loop(self.use_uvloop)
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            loop.call_soon(ready.set)
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="vesc-ble-io", daemon=True)
+        self._thread.start()
+        ready.wait()
+        self.call(self._setup)
+
+    async def _setup(self) -> None:
+        # Created on the I/O loop so its queues and tasks belong to it
+        from .client import VescBleCanClient
+
+        self.client = VescBleCanClient(**self._client_args)
+        self._tasks = [
+            asyncio.create_task(self._forward_values()),
+            asyncio.create_task(watch_loop_lag(self._lags.append, self.lag_period_s)),
+        ]
+
+    async def _forward_values(self) -> None:
+        while True:
+            vals = await self.client.get_next_values()
+            if vals is None:
+                return
+            self._latest[vals.get("vescId", -1)] = vals
+            self.handoff.put(vals)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Disconnect and stop the I/O thread.
+        """
+        if not self._thread:
+            return
+
+        async def shutdown() -> None:
+            if self.client:
+                await self.client.disconnect()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        try:
+            self.call(shutdown, timeout=timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+            self._loop = None
+
+    def __enter__(self) -> "ThreadedVescClient":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # --- running code on the I/O loop ------------------------------------
+
+    def _submit(self, fn: Callable[..., Awaitable], args, kwargs):
+        if not self._loop:
+            raise RuntimeError("I/O thread not started")
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("call() from the I/O thread would deadlock; await the client directly")
+        return asyncio.run_coroutine_threadsafe(fn(*args, **kwargs), self._loop)
+
+    def call(self, fn: Callable[..., Awaitable], *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the I/O loop and block for its result.
+        """
+        return self._submit(fn, args, kwargs).result(timeout)
+
+    async def call_async(self, fn: Callable[..., Awaitable], *args, **kwargs):
+        """
+        Same as call(), awaited from another event loop.
+        """
+        return await asyncio.wrap_future(self._submit(fn, args, kwargs))
+
+    # --- sync facade -----------------------------------------------------
+
+    def connect(self, **kwargs) -> None:
+        self.call(self.client.connect, **kwargs)
+
+    def disconnect(self) -> None:
+        self.call(self.client.disconnect)
+
+    def local_fw_info(self, **kwargs):
+        return self.call(self.client.local_fw_info, **kwargs)
+
+    def discover_can_nodes(self, *args, **kwargs):
+        return self.call(self.client.discover_can_nodes, *args, **kwargs)
+
+    def start_polling_get_values(self, *args, **kwargs) -> None:
+        self.call(self.client.start_polling_get_values, *args, **kwargs)
+
+    def send_custom_app_data_can(self, can_id: int, value: int) -> None:
+        self.call(self.client.send_custom_app_data_can, can_id, value)
+
+    def set_command(self, can_id: int, value, channel: int = 0) -> None:
+        """
+        Latest-wins setpoint for can_id (see client.command_stream); never blocks.
+        """
+        if not self._loop:
+            raise RuntimeError("I/O thread not started")
+        self._loop.call_soon_threadsafe(
+            lambda: self.client.command_stream(can_id).set(value, channel))
+
+    def latest(self, can_id: int) -> Optional[dict]:
+        """
+        Most recent sample from can_id (never blocks, never waits for I/O).
+        """
+        return self._latest.get(can_id)
+
+    def get_values(self, timeout: Optional[float] = None) -> Optional[dict]:
+        return self.handoff.get(timeout)
+
+    # --- async consumers (application loop) ------------------------------
+
+    async def get_next_values(self) -> Optional[dict]:
+        try:
+            return await self.handoff.get_async()
+        except asyncio.CancelledError:
+            return None
+
+    async def run_values_loop(self, on_values: Callable[[dict], Awaitable[None]]) -> None:
+        while True:
+            vals = await self.get_next_values()
+            if vals is None:
+                return
+            await on_values(vals)
+
+    # --- stats -----------------------------------------------------------
+
+    def stats(self) -> dict:
+        h = self.handoff
+        return {
+            "loop": type(self._loop).__module__.split(".")[0] if self._loop else None,
+            "handoffQueued": len(h),
+            "handoffPut": h.put_count,
+            "handoffDropped": h.dropped,
+            "handoffLatencyMs": dist_ms(list(h.latencies)),
+            "ioLoopLagMs": dist_ms(list(self._lags)),
+        }
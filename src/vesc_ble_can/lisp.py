@@ -0,0 +1,330 @@
+import asyncio
+import struct
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from .config import (
+    COMM_LISP_ERASE_CODE,
+    COMM_LISP_READ_CODE,
+    COMM_LISP_SET_RUNNING,
+    COMM_LISP_WRITE_CODE,
+    LISP_CHUNK,
+    LISP_WINDOW,
+)
+from .vesc_crc import crc16_ccitt_init0
+
+if TYPE_CHECKING:
+    from .client import VescBleCanClient
+
+
+@dataclass
+class TransferStats:
+    nbytes: int
+    seconds: float
+    chunks: int
+    retransmits: int
+    window: int
+
+    @property
+    def throughput_bps(self) -> float:
+        return self.nbytes / self.seconds if self.seconds > 0 else 0.0
+
+
+class LispTransferError(RuntimeError):
+    pass
+
+
+def pack_lisp_code(code: bytes) -> bytes:
+    """
+    Build the flash image written to the Lisp code area:
+      [uint32 size][uint16 crc16(code)][code]
+    """
+    return struct.pack(">IH", len(code), crc16_ccitt_init0(code)) + code
+
+
+@contextmanager
+def _mtu_writes(client: "VescBleCanClient") -> Iterator[None]:
+    """
+    Write whole chunks in one MTU-sized BLE write instead of BLE_CHUNK
+    slices for the duration of a transfer.
+    """
+    tx = client.tx
+    if tx is None:
+        raise RuntimeError("Not connected")
+    saved = tx.chunk_size
+    tx.chunk_size = max(saved, client.mtu_chunk_size())
+    try:
+        yield
+    finally:
+        tx.chunk_size = saved
+
+
+# Reply parsers return (offset, ok, data) or None when the payload is not ours.
+
+def _parse_write_ack(payload: bytes) -> Optional[Tuple[int, bool, bytes]]:
+    if len(payload) < 6 or payload[0] != COMM_LISP_WRITE_CODE:
+        return None
+    return struct.unpack_from(">I", payload, 2)[0], payload[1] != 0, b""
+
+
+def _parse_read_reply(payload: bytes) -> Optional[Tuple[int, bool, bytes]]:
+    if len(payload) < 9 or payload[0] != COMM_LISP_READ_CODE:
+        return None
+    total, ofs = struct.unpack_from(">ii", payload, 1)
+    return ofs, total >= 0, payload[9:]
+
+
+async def _pipelined(
+    client: "VescBleCanClient",
+    can_id: int,
+    requests: Dict[int, bytes],
+    reply_comm: int,
+    parse: Callable[[bytes], Optional[Tuple[int, bool, bytes]]],
+    window: int,
+    timeout_s: float,
+    retries: int,
+) -> Tuple[Dict[int, bytes], int]:
+    """
+    Send offset-keyed requests with up to `window` in flight, matching
+    replies by offset. Unacknowledged or NAKed chunks are re-sent (resume
+    after a dropped chunk) up to `retries` times each.
+
+    Returns ({offset: reply data}, retransmit count).
+    """
+    if window < 1:
+        raise ValueError("window must be >= 1")
+
+    q = client.reply_queue(reply_comm)
+    while not q.empty():
+        q.get_nowait()
+
+    pending: Deque[int] = deque(sorted(requests))
+    inflight: Dict[int, float] = {}
+    attempts: Dict[int, int] = {}
+    done: Dict[int, bytes] = {}
+    retransmits = 0
+
+    def requeue(ofs: int) -> None:
+        nonlocal retransmits
+        if attempts[ofs] > retries:
+            raise LispTransferError(f"Chunk at offset {ofs} failed after {attempts[ofs]} attempts")
+        retransmits += 1
+        pending.appendleft(ofs)
+
+    def on_reply(payload: bytes) -> None:
+        parsed = parse(payload)
+        if parsed is None:
+            return
+        ofs, ok, data = parsed
+        if ofs not in inflight:
+            return  # late duplicate of a chunk already re-sent and acked
+
+        del inflight[ofs]
+        if ok:
+            done[ofs] = data
+        else:
+            requeue(ofs)
+
+    def drain() -> None:
+        while not q.empty():
+            on_reply(q.get_nowait())
+
+    while pending or inflight:
+        while pending and len(inflight) < window:
+            ofs = pending.popleft()
+            attempts[ofs] = attempts.get(ofs, 0) + 1
+            # Each chunk's timer starts once its own frame is on the link
+            inflight[ofs] = await client.send_payload(requests[ofs], can_id=can_id)
+            # Replies to earlier chunks queue up while this one is written
+            drain()
+
+        drain()
+        if not inflight:
+            continue
+
+        wait = min(inflight.values()) + timeout_s - time.monotonic()
+        if wait > 0:
+            try:
+                on_reply(await asyncio.wait_for(q.get(), timeout=wait))
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+        # Only chunks whose reply is not already queued have timed out
+        drain()
+        now = time.monotonic()
+        for ofs in [o for o, t in inflight.items() if now - t >= timeout_s]:
+            del inflight[ofs]
+            requeue(ofs)
+
+    return done, retransmits
+
+
+async def _simple_request(
+    client: "VescBleCanClient",
+    can_id: int,
+    payload: bytes,
+    timeout_s: float,
+    retries: int = 2,
+) -> bool:
+    # Only used for idempotent commands, so a lost reply is simply re-sent.
+    q = client.reply_queue(payload[0])
+    while not q.empty():
+        q.get_nowait()
+    for _ in range(retries + 1):
+        await client.send_payload(payload, can_id=can_id)
+        try:
+            resp = await asyncio.wait_for(q.get(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            continue
+        return len(resp) >= 2 and resp[1] != 0
+    return False
+
+
+async def erase_lisp(
+    client: "VescBleCanClient",
+    can_id: int,
+    size: int = -1,
+    timeout_s: float = 5.0,
+) -> bool:
+    """
+    Erase the Lisp code area (size=-1 erases all of it).
+    """
+    return await _simple_request(client, can_id, struct.pack(">Bi", COMM_LISP_ERASE_CODE, size), timeout_s)
+
+
+async def set_lisp_running(
+    client: "VescBleCanClient",
+    can_id: int,
+    running: bool = True,
+    timeout_s: float = 2.0,
+) -> bool:
+    return await _simple_request(client, can_id, bytes([COMM_LISP_SET_RUNNING, 1 if running else 0]), timeout_s)
+
+
+async def write_lisp_image(
+    client: "VescBleCanClient",
+    can_id: int,
+    image: bytes,
+    chunk_size: int = LISP_CHUNK,
+    window: int = LISP_WINDOW,
+    timeout_s: float = 1.0,
+    retries: int = 5,
+) -> TransferStats:
+    """
+    Write a flash image with COMM_LISP_WRITE_CODE, `window` chunks in flight.
+    window=1 is plain stop-and-wait. Each chunk goes out in one MTU-sized
+    BLE write where the link allows it.
+    """
+    requests = {
+        ofs: struct.pack(">BI", COMM_LISP_WRITE_CODE, ofs) + image[ofs:ofs + chunk_size]
+        for ofs in range(0, len(image), chunk_size)
+    }
+    t0 = time.monotonic()
+    with _mtu_writes(client):
+        _, retransmits = await _pipelined(
+            client, can_id, requests, COMM_LISP_WRITE_CODE, _parse_write_ack,
+            window, timeout_s, retries,
+        )
+    return TransferStats(len(image), time.monotonic() - t0, len(requests), retransmits, window)
+
+
+async def read_lisp(
+    client: "VescBleCanClient",
+    can_id: int,
+    chunk_size: int = LISP_CHUNK,
+    window: int = LISP_WINDOW,
+    timeout_s: float = 1.0,
+    retries: int = 5,
+) -> Tuple[bytes, TransferStats]:
+    """
+    Read back the stored Lisp code. The first reply reports the total size;
+    the remaining chunks are then fetched pipelined.
+    """
+    def req(ofs: int) -> bytes:
+        return struct.pack(">Bii", COMM_LISP_READ_CODE, chunk_size, ofs)
+
+    q = client.reply_queue(COMM_LISP_READ_CODE)
+    while not q.empty():
+        q.get_nowait()
+
+    t0 = time.monotonic()
+    total = None
+    first = b""
+    for _ in range(retries + 1):
+        await client.send_payload(req(0), can_id=can_id)
+        try:
+            resp = await asyncio.wait_for(q.get(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            continue
+        if len(resp) >= 9 and resp[0] == COMM_LISP_READ_CODE:
+            total = struct.unpack_from(">i", resp, 1)[0]
+            first = resp[9:]
+            break
+    if total is None:
+        raise LispTransferError("No reply to COMM_LISP_READ_CODE")
+    if total <= 0:
+        return b"", TransferStats(0, time.monotonic() - t0, 1, 0, window)
+
+    requests = {ofs: req(ofs) for ofs in range(chunk_size, total, chunk_size)}
+    done, retransmits = await _pipelined(
+        client, can_id, requests, COMM_LISP_READ_CODE, _parse_read_reply,
+        window, timeout_s, retries,
+    )
+    done[0] = first
+
+    code = b"".join(done[ofs] for ofs in sorted(done))[:total]
+    return code, TransferStats(len(code), time.monotonic() - t0, len(requests) + 1, retransmits, window)
+
+
+def _verify(code: bytes, readback: bytes) -> bool:
+    # Depending on firmware, READ_CODE returns either the bare code or the
+    # whole image including the size/crc header.
+    want = crc16_ccitt_init0(code)
+    if len(readback) == len(code) and crc16_ccitt_init0(readback) == want:
+        return True
+    image = pack_lisp_code(code)
+    return len(readback) >= len(image) and crc16_ccitt_init0(readback[:len(image)]) == crc16_ccitt_init0(image)
+
+
+async def upload_lisp(
+    client: "VescBleCanClient",
+    can_id: int,
+    code: bytes,
+    chunk_size: int = LISP_CHUNK,
+    window: int = LISP_WINDOW,
+    timeout_s: float = 1.0,
+    retries: int = 5,
+    verify: bool = True,
+    run: bool = True,
+) -> TransferStats:
+    """
+    Erase, write (pipelined), CRC-verify and optionally start a Lisp script
+    on a CAN node. Returns the write-phase transfer stats.
+    """
+    image = pack_lisp_code(code)
+
+    await set_lisp_running(client, can_id, False)
+    if not await erase_lisp(client, can_id, len(image)):
+        raise LispTransferError(f"Erase failed on CAN {can_id}")
+
+    stats = await write_lisp_image(
+        client, can_id, image,
+        chunk_size=chunk_size, window=window, timeout_s=timeout_s, retries=retries,
+    )
+
+    if verify:
+        readback, _ = await read_lisp(
+            client, can_id,
+            chunk_size=chunk_size, window=window, timeout_s=timeout_s, retries=retries,
+        )
+        if not _verify(code, readback):
+            raise LispTransferError(f"CRC mismatch after upload to CAN {can_id}")
+
+    if run and not await set_lisp_running(client, can_id, True):
+        raise LispTransferError(f"Could not start Lisp on CAN {can_id}")
+
+    return stats
@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .config import PER_ID_TIMEOUT
+
+# (CAN ID or None for the local device, reply COMM ID)
+RtoKey = Tuple[Optional[int], int]
+
+
+@dataclass
+class RttEstimate:
+    srtt: float
+    rttvar: float
+    samples: int = 1
+
+
+class TimeoutPolicy:
+    """
+    Request timeouts modelled on TCP's retransmission timer (RFC 6298).
+
+    A smoothed RTT and RTT variance are kept per (CAN ID, COMM ID):
+
+        RTO = SRTT + K * RTTVAR, clamped to [min_s, max_s]
+
+    and doubled for every retry of the same request (bounded exponential
+    back-off). A CAN node with no samples yet borrows the estimate of the
+    same command across all CAN nodes, then falls back to initial_s.
+
+    Callers should only report RTTs of requests that were answered on the
+    first attempt (Karn's algorithm): a reply after a retry is ambiguous.
+    """
+
+    def __init__(
+        self,
+        initial_s: float = PER_ID_TIMEOUT,
+        min_s: float = 0.05,
+        max_s: float = 2.0,
+        alpha: float = 1 / 8,
+        beta: float = 1 / 4,
+        k: float = 4.0,
+    ):
+        self.initial_s = initial_s
+        self.min_s = min_s
+        self.max_s = max_s
+        self.alpha = alpha
+        self.beta = beta
+        self.k = k
+
+        self._est: Dict[RtoKey, RttEstimate] = {}
+        self._by_comm: Dict[int, RttEstimate] = {}
+
+    def _update(self, table: dict, key, rtt_s: float) -> None:
+        e = table.get(key)
+        if e is None:
+            table[key] = RttEstimate(srtt=rtt_s, rttvar=rtt_s / 2)
+            return
+        e.rttvar += self.beta * (abs(e.srtt - rtt_s) - e.rttvar)
+        e.srtt += self.alpha * (rtt_s - e.srtt)
+        e.samples += 1
+
+    def observe(self, can_id: Optional[int], comm_id: int, rtt_s: float) -> None:
+        if rtt_s < 0:
+            return
+        self._update(self._est, (can_id, comm_id), rtt_s)
+        if can_id is not None:
+            # The local device answers much faster than forwarded requests
+            self._update(self._by_comm, comm_id, rtt_s)
+
+    def estimate(self, can_id: Optional[int], comm_id: int) -> Optional[RttEstimate]:
+        e = self._est.get((can_id, comm_id))
+        if e is None and can_id is not None:
+            e = self._by_comm.get(comm_id)
+        return e
+
+    def rto(self, can_id: Optional[int], comm_id: int, initial_s: Optional[float] = None) -> float:
+        e = self.estimate(can_id, comm_id)
+        if e is None:
+            # Caller-supplied initial values (e.g. for slow commands) may exceed max_s
+            return max(self.min_s, self.initial_s if initial_s is None else initial_s)
+        return min(self.max_s, max(self.min_s, e.srtt + self.k * e.rttvar))
+
+    def timeout(
+        self,
+        can_id: Optional[int],
+        comm_id: int,
+        attempt: int = 0,
+        initial_s: Optional[float] = None,
+    ) -> float:
+        """
+        Timeout for the given attempt (0 = first send) of a request; retries
+        back off up to max_s (or the initial timeout if that is larger).
+        """
+        rto = self.rto(can_id, comm_id, initial_s)
+        return min(max(self.max_s, rto), rto * (2 ** attempt))
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            f"{'local' if cid is None else cid}/{comm}": {
+                "srttMs": e.srtt * 1000.0,
+                "rttvarMs": e.rttvar * 1000.0,
+                "rtoMs": self.rto(cid, comm) * 1000.0,
+                "samples": e.samples,
+            }
+            for (cid, comm), e in sorted(self._est.items(), key=lambda kv: (kv[0][0] is not None, kv[0]))
+        }
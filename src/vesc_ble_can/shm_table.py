@@ -0,0 +1,172 @@
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+# Numeric COMM_GET_VALUES fields, in slot order (all stored as float64)
+FIELDS: Tuple[str, ...] = (
+    "tempMos", "tempMotor", "currentMotor", "currentIn", "id", "iq",
+    "dutyNow", "rpm", "vIn", "ampHours", "ampHoursCharged", "wattHours",
+    "wattHoursCharged", "tachometer", "tachometerAbs", "faultCode",
+    "position", "vescId", "tempMos1", "tempMos2", "tempMos3", "vd", "vq",
+)
+
+MAGIC = 0x56455343  # "VESC"
+LAYOUT_VERSION = 1
+NUM_SLOTS = 256      # one per CAN ID
+
+# Header: magic, layout version, slot count, field count, slot size
+_HEADER = struct.Struct("<IHHHH")
+_HEADER_SIZE = 16
+# Slot: seq (u32, odd while being written), pad, wall-clock time, fields
+_SEQ = struct.Struct("<I")
+_SLOT = struct.Struct("<II d" + "d" * len(FIELDS))
+_BODY = struct.Struct("<d" + "d" * len(FIELDS))
+_BODY_OFFSET = 8
+
+DEFAULT_NAME = "vesc_ble_can"
+
+# Tables published by this process (its resource tracker already owns them)
+_published = set()
+
+
+def table_size() -> int:
+    return _HEADER_SIZE + NUM_SLOTS * _SLOT.size
+
+
+class TelemetryShmPublisher:
+    """
+    Writes each decoded COMM_GET_VALUES record into a fixed-layout shared
+    memory table, one slot per CAN ID.
+
+    Each slot is guarded by a seqlock: the sequence counter is odd while the
+    slot is being written, so readers retry instead of taking a torn record.
+    There is a single writer (this process), so no lock is needed.
+
+    Python cannot issue memory barriers, so the seqlock relies on the CPU
+    keeping stores (and loads) in program order. That holds on x86/x86-64;
+    on weakly ordered CPUs (ARM, e.g. a Raspberry Pi or Apple silicon) a
+    reader on another core can occasionally get a torn record.
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME, replace: bool = False):
+        """
+        replace=True takes over an existing segment of the same name (e.g.
+        left by a run that did not unlink it); otherwise FileExistsError.
+        """
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=table_size())
+        except FileExistsError:
+            if not replace:
+                raise FileExistsError(
+                    f"Shared memory {name!r} already exists (another publisher?); pass replace=True to take it over"
+                ) from None
+            self._shm = shared_memory.SharedMemory(name=name)
+            if self._shm.size < table_size():
+                self._shm.close()
+                raise ValueError(f"Shared memory {name!r} is too small for a telemetry table")
+        self.name = name
+        _published.add(name)
+        self._buf = self._shm.buf
+        self._buf[:table_size()] = bytes(table_size())
+        _HEADER.pack_into(self._buf, 0, MAGIC, LAYOUT_VERSION, NUM_SLOTS, len(FIELDS), _SLOT.size)
+        self._seq = [0] * NUM_SLOTS
+
+    def publish(self, vals: dict) -> None:
+        vesc_id = vals.get("vescId", -1)
+        if not 0 <= vesc_id < NUM_SLOTS:
+            return
+
+        off = _HEADER_SIZE + vesc_id * _SLOT.size
+        seq = self._seq[vesc_id] + 1
+        _SEQ.pack_into(self._buf, off, seq)                 # odd: write in progress
+        _BODY.pack_into(self._buf, off + _BODY_OFFSET, time.time(), *(float(vals.get(k, 0.0)) for k in FIELDS))
+        _SEQ.pack_into(self._buf, off, seq + 1)             # even: consistent
+        self._seq[vesc_id] = seq + 1
+
+    def close(self, unlink: bool = True) -> None:
+        if self._shm is None:
+            return
+        self._buf.release()
+        self._shm.close()
+        if unlink:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        _published.discard(self.name)
+        self._shm = None
+
+
+class TelemetryShmReader:
+    """
+    Lock-free reader for a table written by TelemetryShmPublisher, usable
+    from any local process. Reads unpack straight from the shared buffer.
+
+    seq(can_id) increases by 2 per update (0 = never written), so callers
+    can cheaply poll for changes before reading.
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME, max_retries: int = 100):
+        self._shm = shared_memory.SharedMemory(name=name)
+        if name not in _published:
+            _untrack(self._shm)
+        self._buf = self._shm.buf
+        self.max_retries = max_retries
+
+        magic, version, slots, nfields, slot_size = _HEADER.unpack_from(self._buf, 0)
+        if (magic, version, slots, nfields, slot_size) != (MAGIC, LAYOUT_VERSION, NUM_SLOTS, len(FIELDS), _SLOT.size):
+            self.close()
+            raise ValueError(f"Shared memory {name!r} does not hold a compatible telemetry table")
+
+    def seq(self, can_id: int) -> int:
+        return _SEQ.unpack_from(self._buf, _HEADER_SIZE + can_id * _SLOT.size)[0]
+
+    def read(self, can_id: int) -> Optional[dict]:
+        """
+        Latest record for can_id (with "_seq" and "_time" keys), or None if
+        the slot was never written or stayed busy for max_retries attempts.
+        """
+        off = _HEADER_SIZE + can_id * _SLOT.size
+        buf = self._buf
+        for _ in range(self.max_retries):
+            s1 = _SEQ.unpack_from(buf, off)[0]
+            if s1 == 0:
+                return None
+            if s1 & 1:
+                continue
+            body = _BODY.unpack_from(buf, off + _BODY_OFFSET)
+            if _SEQ.unpack_from(buf, off)[0] == s1:
+                out = dict(zip(FIELDS, body[1:]))
+                out["vescId"] = int(out["vescId"])
+                out["faultCode"] = int(out["faultCode"])
+                out["_seq"] = s1
+                out["_time"] = body[0]
+                return out
+        return None
+
+    def read_all(self) -> Dict[int, dict]:
+        out = {}
+        for can_id in range(NUM_SLOTS):
+            if self.seq(can_id):
+                rec = self.read(can_id)
+                if rec:
+                    out[can_id] = rec
+        return out
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._buf.release()
+        self._shm.close()
+        self._shm = None
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # Before Python 3.13 attaching registers the segment with this process's
+    # resource tracker, which would unlink it when the reader exits.
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
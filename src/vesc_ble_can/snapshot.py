@@ -0,0 +1,82 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+
+@dataclass
+class PollSnapshot:
+    """
+    The whole polled bus at the end of one poll cycle.
+
+    nodes holds each node's latest sample (possibly from an earlier cycle,
+    see age_s); missed lists the nodes that did not answer this cycle.
+    """
+
+    cycle: int
+    t: float                                   # monotonic start of the cycle
+    nodes: Dict[int, dict] = field(default_factory=dict)
+    age_s: Dict[int, float] = field(default_factory=dict)
+    missed: List[int] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return not self.missed
+
+
+class SnapshotAssembler:
+    """
+    Groups poll replies into one PollSnapshot per cycle.
+
+    A cycle closes as soon as every node polled in it has answered, or when
+    the next cycle begins; replies that arrive later only update the latest
+    sample (and show up with their age in following snapshots).
+    """
+
+    def __init__(self):
+        self._latest: Dict[int, dict] = {}
+        self._can_ids: List[int] = []
+        self._cycle: Optional[int] = None
+        self._t = 0.0
+        self._waiting: Set[int] = set()
+        self._answered: Set[int] = set()
+
+    def begin_cycle(self, cycle: int, can_ids: Iterable[int], now: float) -> Optional[PollSnapshot]:
+        """
+        Start a cycle; returns the previous one if it was still open.
+        """
+        prev = self._close() if self._cycle is not None else None
+        self._cycle = cycle
+        self._t = now
+        self._can_ids = list(can_ids)
+        self._waiting = set(self._can_ids)
+        self._answered = set()
+        return prev
+
+    def skip(self, can_id: int) -> Optional[PollSnapshot]:
+        """
+        can_id is not polled this cycle (counts as missed).
+        """
+        self._waiting.discard(can_id)
+        return self._close() if self._cycle is not None and not self._waiting else None
+
+    def on_sample(self, vals: dict) -> Optional[PollSnapshot]:
+        vesc_id = vals.get("vescId", -1)
+        self._latest[vesc_id] = vals
+        if self._cycle is None or vals.get("_cycle") != self._cycle:
+            return None
+        self._answered.add(vesc_id)
+        self._waiting.discard(vesc_id)
+        return self._close() if not self._waiting else None
+
+    def _close(self) -> PollSnapshot:
+        now = time.monotonic()
+        snap = PollSnapshot(cycle=self._cycle, t=self._t)
+        for cid in self._can_ids:
+            vals = self._latest.get(cid)
+            if vals is not None:
+                snap.nodes[cid] = vals
+                snap.age_s[cid] = now - vals.get("_rx_time", now)
+            if cid not in self._answered:
+                snap.missed.append(cid)
+        self._cycle = None
+        return snap
@@ -0,0 +1,378 @@
+import asyncio
+import math
+import os
+import random
+import struct
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+from .ble_helper import BLEHelperPy
+from .stats import Reservoir, dist_ms, watch_loop_lag
+from .config import BLE_CHUNK, COMM_FORWARD_CAN, COMM_FW_VERSION, COMM_GET_VALUES
+from .vesc_decode import GET_VALUES_VESC_ID_OFFSET
+from .vesc_packet import vesc_pack
+
+# COMM_GET_VALUES reply body, in the order vesc_decode reads it
+_GET_VALUES = struct.Struct(">hhiiiihihiiiiiiBiBhhhii")
+
+# Cycles averaged at each end of the run for the period drift
+DRIFT_CYCLES = 100
+
+
+@dataclass
+class SimConfig:
+    """
+    Behaviour of the simulated VESC Express and its CAN bus.
+    """
+
+    nodes: int = 254              # CAN IDs first_id .. first_id + nodes - 1
+    first_id: int = 1
+    latency_s: float = 0.02       # CAN round trip + firmware turnaround
+    jitter_s: float = 0.01        # uniform extra latency, 0..jitter_s
+    loss: float = 0.0             # probability a request gets no reply
+    corrupt: float = 0.0          # probability a reply frame gets one flipped byte
+    notify_size: int = 244        # max bytes per notification (ATT MTU - 3)
+    coalesce_s: float = 0.0075    # replies within this window share notifications
+    write_s: float = 0.0          # time the BLE stack takes per GATT write
+    seed: Optional[int] = None
+
+
+class FakeVescExpress:
+    """
+    In-process, BleakClient-compatible VESC Express with simulated CAN nodes.
+
+    Pass it to VescBleCanClient.connect(ble_client=...). It answers local
+    and forwarded COMM_FW_VERSION and COMM_GET_VALUES with real frame sizes,
+    and delivers replies through notify-sized, coalesced notifications.
+    """
+
+    address = "SIM:VESC:EXPRESS"
+
+    def __init__(self, cfg: SimConfig):
+        self.cfg = cfg
+        self.mtu_size = cfg.notify_size + 3
+        self.node_ids = set(range(cfg.first_id, cfg.first_id + cfg.nodes))
+        self._rng = random.Random(cfg.seed)
+        self._parser = BLEHelperPy()
+        self._connected = False
+        self._callback: Optional[Callable] = None
+
+        self._out = bytearray()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        # GET_VALUES requests that will be answered intact, per node (for latency)
+        self.request_times: Dict[int, Deque[float]] = {}
+        self.stats = {
+            "writes": 0, "requests": 0, "getValues": 0, "dropped": 0, "corrupted": 0,
+            "frames": 0, "notifications": 0, "bytes": 0,
+        }
+        self.sim_s = 0.0  # time spent inside the simulator (CPU accounting)
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self) -> None:
+        self._connected = True
+
+    async def disconnect(self) -> None:
+        self._connected = False
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    async def start_notify(self, _uuid: str, callback: Callable) -> None:
+        self._callback = callback
+
+    async def stop_notify(self, _uuid: str) -> None:
+        self._callback = None
+
+    async def write_gatt_char(self, _uuid: str, data: bytes, response: bool = False) -> None:
+        if self.cfg.write_s:
+            await asyncio.sleep(self.cfg.write_s)
+        t0 = time.perf_counter()
+        self.stats["writes"] += 1
+        for payload in self._parser.feed(data):
+            self._on_request(payload)
+        self.sim_s += time.perf_counter() - t0
+
+    def _on_request(self, payload: bytes) -> None:
+        self.stats["requests"] += 1
+        if payload[0] == COMM_FORWARD_CAN and len(payload) >= 3:
+            can_id, comm_id = payload[1], payload[2]
+            if can_id not in self.node_ids:
+                return
+        else:
+            can_id, comm_id = None, payload[0]
+
+        if comm_id == COMM_FW_VERSION:
+            reply = self._fw_reply(can_id)
+        elif comm_id == COMM_GET_VALUES and can_id is not None:
+            self.stats["getValues"] += 1
+            reply = self._values_reply(can_id)
+        else:
+            return
+
+        cfg = self.cfg
+        if self._rng.random() < cfg.loss:
+            self.stats["dropped"] += 1
+            return
+
+        frame = bytearray(vesc_pack(reply))
+        if cfg.corrupt and self._rng.random() < cfg.corrupt:
+            self.stats["corrupted"] += 1
+            frame[self._rng.randrange(len(frame))] ^= 0x5A
+        elif comm_id == COMM_GET_VALUES:
+            self.request_times.setdefault(can_id, deque()).append(time.monotonic())
+
+        delay = cfg.latency_s + self._rng.random() * cfg.jitter_s
+        asyncio.get_running_loop().call_later(delay, self._emit, bytes(frame))
+
+    def _fw_reply(self, can_id: Optional[int]) -> bytes:
+        if can_id is None:
+            name, uid = b"VESC Express T", bytes(12)
+        else:
+            name, uid = b"60_MK6", bytes([0xC0, 0xFF, 0xEE]) + bytes(8) + bytes([can_id])
+        return bytes([COMM_FW_VERSION, 6, 5]) + name + b"\x00" + uid + bytes([0, 0, 1, 1])
+
+    def _values_reply(self, can_id: int) -> bytes:
+        ph = time.monotonic() + can_id
+        rpm = 3000.0 * math.sin(ph * 0.5)
+        return bytes([COMM_GET_VALUES]) + _GET_VALUES.pack(
+            int((35.0 + can_id % 7) * 10), int((40.0 + can_id % 5) * 10),
+            int(12.5 * 100), int(8.2 * 100), int(-0.3 * 100), int(12.4 * 100),
+            int(0.42 * 1000), int(rpm), int(48.1 * 10),
+            12345, 67, 890123, 4567, int(rpm * 10), int(abs(rpm) * 10),
+            0, int(0.5 * 1e6), can_id,
+            350, 351, 352, int(1.2 * 100), int(20.3 * 100),
+        )
+
+    def _emit(self, frame: bytes) -> None:
+        self.stats["frames"] += 1
+        self._out += frame
+        if len(self._out) >= self.cfg.notify_size or not self.cfg.coalesce_s:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.cfg.coalesce_s, self._flush)
+
+    def _flush(self) -> None:
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        out, self._out = bytes(self._out), bytearray()
+        n = self.cfg.notify_size
+        for i in range(0, len(out), n):
+            chunk = bytearray(out[i:i + n])
+            self.stats["notifications"] += 1
+            self.stats["bytes"] += len(chunk)
+            if self._callback:
+                self._callback(None, chunk)
+
+
+@dataclass
+class SoakConfig:
+    duration_s: float = 60.0
+    interval_s: float = 0.5
+    batch: bool = False
+    adaptive: bool = False
+    pace_s: float = 0.03          # TX writer pacing per chunk
+    chunk_size: int = BLE_CHUNK
+    can_start: Optional[int] = None  # discovery range; None = first/last simulated ID
+    can_end: Optional[int] = None
+    discover: bool = True         # False polls the simulated IDs directly
+    sample_every_s: float = 5.0   # RSS / queue sampling period
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak, not current, outside Linux (KiB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+async def run_soak(
+    sim: SimConfig,
+    soak: SoakConfig,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Drive VescBleCanClient discovery and polling against FakeVescExpress for
+    soak.duration_s and return a JSON-serialisable report.
+
+    progress, if given, is called with every periodic RSS/queue sample.
+    """
+    from .client import VescBleCanClient
+
+    dev = FakeVescExpress(sim)
+    client = VescBleCanClient(address=dev.address)
+    await client.connect(ble_client=dev, settle_s=0.0)
+    client.tx.pace_s = soak.pace_s
+    client.tx.chunk_size = soak.chunk_size
+
+    report: dict = {"sim": asdict(sim), "soak": asdict(soak)}
+    # Bounded, so hours of samples do not show up in the RSS being measured
+    latencies = Reservoir(seed=sim.seed)
+    periods = Reservoir(seed=sim.seed)
+    # Cycle periods at the start and end of the run, for drift
+    first_periods: List[float] = []
+    last_periods: Deque[float] = deque(maxlen=DRIFT_CYCLES)
+    lags = Reservoir(seed=sim.seed)
+    timeline: List[dict] = []
+    counts = {"samples": 0, "snapshots": 0, "incomplete": 0, "parsed": 0, "maxValuesQ": 0, "maxTxPending": 0}
+
+    def on_payload(payload: bytes) -> None:
+        counts["parsed"] += 1
+        if payload[0] == COMM_GET_VALUES and len(payload) > GET_VALUES_VESC_ID_OFFSET:
+            q = dev.request_times.get(payload[GET_VALUES_VESC_ID_OFFSET])
+            if q:
+                latencies.add(time.monotonic() - q.popleft())
+
+    async def consume_values() -> None:
+        # get_next_values() returns None once cancelled
+        while await client.get_next_values() is not None:
+            counts["samples"] += 1
+
+    async def consume_snapshots() -> None:
+        last_t = None
+        async for snap in client.snapshots():
+            counts["snapshots"] += 1
+            counts["incomplete"] += not snap.complete
+            if last_t is not None:
+                period = snap.t - last_t
+                periods.add(period)
+                if len(first_periods) < DRIFT_CYCLES:
+                    first_periods.append(period)
+                last_periods.append(period)
+            last_t = snap.t
+
+    tasks: List[asyncio.Task] = []
+    try:
+        client.add_payload_listener(on_payload)
+        tasks.append(asyncio.create_task(watch_loop_lag(lags.add)))
+
+        t0 = time.monotonic()
+        if soak.discover:
+            can_start = min(dev.node_ids) if soak.can_start is None else soak.can_start
+            can_end = max(dev.node_ids) if soak.can_end is None else soak.can_end
+            nodes = sorted(await client.discover_can_nodes(can_start, can_end, gap_s=0.0))
+        else:
+            nodes = sorted(dev.node_ids)
+        # Every simulated node counts, so a narrow range shows up as missing
+        expected = sorted(dev.node_ids)
+        report["discovery"] = {
+            "seconds": time.monotonic() - t0,
+            "found": len(nodes),
+            "expected": len(expected),
+            "missing": sorted(set(expected) - set(nodes)),
+            "spurious": sorted(set(nodes) - set(dev.node_ids)),
+        }
+        if not nodes:
+            raise RuntimeError("Soak: no nodes to poll")
+
+        lags.clear()
+        for q in dev.request_times.values():
+            q.clear()
+        base = dict(dev.stats)
+        parsed0 = counts["parsed"]
+        cpu0, sim0, rss0 = time.process_time(), dev.sim_s, rss_mb()
+
+        tasks.append(asyncio.create_task(consume_values()))
+        tasks.append(asyncio.create_task(consume_snapshots()))
+        t_start = time.monotonic()
+        await client.start_polling_get_values(nodes, interval_s=soak.interval_s, batch=soak.batch,
+                                              adaptive=soak.adaptive)
+
+        while True:
+            now = time.monotonic()
+            counts["maxValuesQ"] = max(counts["maxValuesQ"], client._values_q.qsize())
+            counts["maxTxPending"] = max(counts["maxTxPending"], client.tx.pending)
+            point = {
+                "t": now - t_start,
+                "rssMb": rss_mb(),
+                "samples": counts["samples"],
+                "valuesQ": client._values_q.qsize(),
+                "txPending": client.tx.pending,
+                "pendingPolls": sum(len(p) for p in client._poll_sent.values()),
+            }
+            timeline.append(point)
+            if progress:
+                progress(point)
+            if now - t_start >= soak.duration_s:
+                break
+            await asyncio.sleep(min(soak.sample_every_s, soak.duration_s - (now - t_start)))
+
+        # Stop polling, then let in-flight replies land
+        client.stop_polling()
+        await asyncio.sleep(sim.latency_s + sim.jitter_s + sim.coalesce_s + 0.1)
+        elapsed = time.monotonic() - t_start
+
+        stats = {k: dev.stats[k] - base[k] for k in dev.stats}
+        cpu_s = time.process_time() - cpu0
+        sim_s = dev.sim_s - sim0
+        client_cpu_s = max(0.0, cpu_s - sim_s)
+        answered = stats["getValues"] - stats["dropped"] - stats["corrupted"]
+        # The first and last DRIFT_CYCLES periods (10% each on short runs)
+        tail = max(1, min(DRIFT_CYCLES, len(periods) // 10))
+
+        report.update({
+            "seconds": elapsed,
+            "nodes": len(nodes),
+            "throughput": {
+                "samples": counts["samples"],
+                "samplesPerS": counts["samples"] / elapsed,
+                "perNodeHz": counts["samples"] / elapsed / len(nodes),
+                "pollsSent": stats["getValues"],
+                "notifications": stats["notifications"],
+                "notifyBytesPerS": stats["bytes"] / elapsed,
+            },
+            "dropped": {
+                "injectedLoss": stats["dropped"],
+                "injectedCorrupt": stats["corrupted"],
+                # Intact replies that never became samples (parser or pipeline loss)
+                "unexplained": max(0, answered - counts["samples"]),
+            },
+            "latencyMs": dist_ms(latencies),
+            "cycles": {
+                "count": counts["snapshots"],
+                "incomplete": counts["incomplete"],
+                "periodMs": dist_ms(periods),
+                # Mean period of the last vs the first cycles
+                "driftMs": (
+                    sum(list(last_periods)[-tail:]) / tail - sum(first_periods[:tail]) / tail
+                ) * 1000.0 if len(periods) else 0.0,
+            },
+            "loopLagMs": dist_ms(lags),
+            "cpu": {
+                "processS": cpu_s,
+                "simulatorS": sim_s,
+                "clientUsPerSample": client_cpu_s / counts["samples"] * 1e6 if counts["samples"] else 0.0,
+            },
+            "parser": {
+                "framesSent": stats["frames"],
+                "payloadsParsed": counts["parsed"] - parsed0,
+                "lost": max(0, stats["frames"] - stats["corrupted"] - (counts["parsed"] - parsed0)),
+            },
+            "memory": {
+                "rssStartMb": rss0,
+                "rssEndMb": timeline[-1]["rssMb"],
+                "rssGrowthMb": timeline[-1]["rssMb"] - rss0,
+                "maxValuesQ": counts["maxValuesQ"],
+                "streamDrops": client.stream_drops,
+                "maxTxPending": counts["maxTxPending"],
+                "timeline": timeline,
+            },
+            "timeouts": client.timeouts.snapshot() if len(nodes) <= 16 else {},
+        })
+        return report
+
+    finally:
+        client.remove_payload_listener(on_payload)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.disconnect()
@@ -0,0 +1,77 @@
+import asyncio
+import random
+from typing import Callable, List, Optional, Sequence, Union
+
+
+class Reservoir:
+    """
+    Fixed-size uniform sample of a stream (Vitter's algorithm R).
+
+    Percentiles over hours of samples without keeping every value; count
+    and max stay exact.
+    """
+
+    def __init__(self, size: int = 10000, seed: Optional[int] = None):
+        if size <= 0:
+            raise ValueError("size must be > 0")
+        self.size = size
+        self.values: List[float] = []
+        self.count = 0
+        self.max = 0.0
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        if x > self.max or self.count == 1:
+            self.max = x
+        if len(self.values) < self.size:
+            self.values.append(x)
+        else:
+            j = self._rng.randrange(self.count)
+            if j < self.size:
+                self.values[j] = x
+
+    def clear(self) -> None:
+        self.values.clear()
+        self.count = 0
+        self.max = 0.0
+
+
+def percentile(xs: Sequence[float], p: float) -> float:
+    if not xs:
+        return 0.0
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(round(p * (len(s) - 1))))]
+
+
+def dist_ms(xs: Union[Sequence[float], Reservoir]) -> dict:
+    """
+    Count, p50/p95/p99 and max of durations in seconds, in milliseconds.
+    """
+    if isinstance(xs, Reservoir):
+        n, values, top = xs.count, sorted(xs.values), xs.max
+    else:
+        n, values = len(xs), sorted(xs)
+        top = values[-1] if values else 0.0
+    return {
+        "n": n,
+        "p50": percentile(values, 0.50) * 1000.0,
+        "p95": percentile(values, 0.95) * 1000.0,
+        "p99": percentile(values, 0.99) * 1000.0,
+        "max": top * 1000.0,
+    }
+
+
+async def watch_loop_lag(on_lag: Callable[[float], None], period_s: float = 0.05) -> None:
+    """
+    Report how late each period_s sleep of the running event loop wakes up
+    (its scheduling lag) to on_lag, until cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        t = loop.time()
+        await asyncio.sleep(period_s)
+        on_lag(max(0.0, loop.time() - t - period_s))
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from .config import BLE_CHUNK, COMM_GET_VALUES, PER_ID_TIMEOUT, GAP
+from .stats import percentile
+from .vesc_decode import GET_VALUES_VESC_ID_OFFSET
+from .vesc_packet import make_forward_can_get_values
+
+if TYPE_CHECKING:
+    from .client import VescBleCanClient
+
+MIN_INTERVAL_S = 0.02
+MAX_INTERVAL_S = 5.0
+
+
+@dataclass
+class LinkProfile:
+    """
+    Link settings for one BLE device, picked by calibrate_link().
+    """
+
+    chunk_size: int = BLE_CHUNK
+    pace_s: float = 0.03        # sleep after each BLE write
+    poll_gap_s: float = 0.01    # extra gap between per-node poll requests
+    interval_s: float = 0.5     # sleep between poll cycles
+    per_id_timeout: float = PER_ID_TIMEOUT
+    gap_s: float = GAP          # discovery gap between CAN IDs
+
+    # Measurements behind the choice (informational)
+    rtt_p50_ms: float = 0.0
+    rtt_p95_ms: float = 0.0
+    loss: float = 0.0
+    write_rate_hz: float = 0.0
+    poll_rate_hz: float = 0.0
+    nodes: int = 0
+    measured_at: float = 0.0
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "LinkProfile":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in raw.items() if k in known})
+
+
+def default_profile_path() -> str:
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "vesc-ble-can", "link_profiles.json")
+
+
+class ProfileStore:
+    """
+    Link profiles keyed by BLE device address, in one JSON file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_profile_path()
+
+    def _load_all(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            return raw if isinstance(raw, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, device: str) -> Optional[LinkProfile]:
+        raw = self._load_all().get(device.lower())
+        return LinkProfile.from_dict(raw) if isinstance(raw, dict) else None
+
+    def save(self, device: str, profile: LinkProfile) -> None:
+        all_profiles = self._load_all()
+        all_profiles[device.lower()] = asdict(profile)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(all_profiles, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class _ReplyTap:
+    """
+    Payload listener that timestamps GET_VALUES replies per vescId.
+    """
+
+    def __init__(self):
+        self.waiters: Dict[int, asyncio.Future] = {}
+        self.count = 0
+
+    def __call__(self, payload: bytes) -> None:
+        if payload[0] != COMM_GET_VALUES or len(payload) <= GET_VALUES_VESC_ID_OFFSET:
+            return
+        self.count += 1
+        fut = self.waiters.pop(payload[GET_VALUES_VESC_ID_OFFSET], None)
+        if fut and not fut.done():
+            fut.set_result(time.monotonic())
+
+
+async def calibrate_link(
+    client: "VescBleCanClient",
+    can_ids: Sequence[int],
+    rtt_samples: int = 10,
+    burst: int = 30,
+    pace_candidates: Sequence[float] = (0.03, 0.02, 0.012, 0.008, 0.004, 0.0),
+    max_loss: float = 0.02,
+) -> LinkProfile:
+    """
+    Measure the live link and pick settings:
+
+      1. reply latency and loss with stop-and-wait GET_VALUES per node
+      2. write rate and loss for bursts at decreasing write pacing; the
+         fastest pacing with loss <= max_loss wins
+      3. poll interval: the fastest cycle whose period covers both the
+         link time for one request per node and the p95 reply latency
+
+    The client's current pacing is restored afterwards; apply the result
+    with client.apply_link_profile().
+    """
+    tx = client.tx
+    if tx is None:
+        raise RuntimeError("Not connected")
+    if not can_ids:
+        raise ValueError("calibrate_link needs at least one CAN ID")
+
+    profile = LinkProfile(chunk_size=client.mtu_chunk_size(), nodes=len(can_ids))
+    saved = (tx.chunk_size, tx.pace_s)
+    tap = _ReplyTap()
+    client.add_payload_listener(tap)
+    loop = asyncio.get_running_loop()
+
+    try:
+        tx.chunk_size = profile.chunk_size
+
+        # 1) Stop-and-wait latency
+        rtts: List[float] = []
+        lost = 0
+        for i in range(rtt_samples * len(can_ids)):
+            cid = can_ids[i % len(can_ids)]
+            fut = loop.create_future()
+            tap.waiters[cid] = fut
+            t_sent = await tx.write(make_forward_can_get_values(cid))
+            try:
+                t_rx = await asyncio.wait_for(fut, timeout=1.0)
+                rtts.append(t_rx - t_sent)
+            except asyncio.TimeoutError:
+                lost += 1
+            finally:
+                tap.waiters.pop(cid, None)
+
+        if not rtts:
+            raise RuntimeError("No GET_VALUES replies during calibration")
+
+        profile.rtt_p50_ms = percentile(rtts, 0.5) * 1000.0
+        profile.rtt_p95_ms = percentile(rtts, 0.95) * 1000.0
+        profile.loss = lost / (rtt_samples * len(can_ids))
+        rtt_p95 = profile.rtt_p95_ms / 1000.0
+
+        # 2) Pacing sweep
+        best_pace, best_rate = saved[1], 0.0
+        for pace in pace_candidates:
+            tx.pace_s = pace
+            before = tap.count
+            t0 = time.monotonic()
+            for i in range(burst):
+                await tx.write(make_forward_can_get_values(can_ids[i % len(can_ids)]))
+            elapsed = max(time.monotonic() - t0, 1e-6)
+            await asyncio.sleep(rtt_p95 * 2 + 0.05)
+
+            loss = max(0.0, 1.0 - (tap.count - before) / burst)
+            if loss > max_loss:
+                break
+            best_pace, best_rate = pace, burst / elapsed
+
+        profile.pace_s = best_pace
+        profile.write_rate_hz = best_rate or 1.0 / max(best_pace, 1e-3)
+
+        # 3) Poll interval
+        cycle_s = len(can_ids) / profile.write_rate_hz
+        period = max(cycle_s * 1.25, rtt_p95 * 1.2)
+        profile.poll_gap_s = 0.0
+        profile.interval_s = min(MAX_INTERVAL_S, max(MIN_INTERVAL_S, period - cycle_s))
+        profile.poll_rate_hz = 1.0 / (cycle_s + profile.interval_s)
+        profile.per_id_timeout = min(1.0, max(0.05, rtt_p95 * 2.0))
+        profile.gap_s = min(GAP, best_pace)
+        profile.measured_at = time.time()
+        return profile
+
+    finally:
+        client.remove_payload_listener(tap)
+        tx.chunk_size, tx.pace_s = saved
+
+
+class AdaptivePollController:
+    """
+    Runtime poll-interval control: backs off when reply loss or latency
+    rises, and creeps back toward min_interval_s while the link is clean.
+    """
+
+    def __init__(
+        self,
+        interval_s: float,
+        min_interval_s: Optional[float] = None,
+        max_interval_s: float = MAX_INTERVAL_S,
+        loss_high: float = 0.05,
+        loss_low: float = 0.01,
+        step_up: float = 1.25,
+        step_down: float = 0.95,
+        alpha: float = 0.2,
+    ):
+        self.interval_s = interval_s
+        self.min_interval_s = interval_s if min_interval_s is None else min_interval_s
+        self.max_interval_s = max_interval_s
+        self.loss_high = loss_high
+        self.loss_low = loss_low
+        self.step_up = step_up
+        self.step_down = step_down
+        self.alpha = alpha
+
+        self.loss = 0.0
+        self.rtt_s: Optional[float] = None
+        self._rtt_base: Optional[float] = None
+
+    def on_rtt(self, rtt_s: float) -> None:
+        a = self.alpha
+        self.rtt_s = rtt_s if self.rtt_s is None else self.rtt_s + a * (rtt_s - self.rtt_s)
+        if self._rtt_base is None or self.rtt_s < self._rtt_base:
+            self._rtt_base = self.rtt_s
+
+    def on_cycle(self, sent: int, received: int) -> float:
+        """
+        Feed one finished poll cycle; returns the interval for the next one.
+        """
+        if sent > 0:
+            cycle_loss = max(0.0, 1.0 - received / sent)
+            self.loss += self.alpha * (cycle_loss - self.loss)
+
+        congested = (
+            self.rtt_s is not None
+            and self._rtt_base is not None
+            and self.rtt_s > 2.0 * self._rtt_base
+            and self.rtt_s > self.interval_s
+        )
+
+        if self.loss > self.loss_high or congested:
+            self.interval_s = min(self.max_interval_s, self.interval_s * self.step_up)
+        elif self.loss < self.loss_low:
+            self.interval_s = max(self.min_interval_s, self.interval_s * self.step_down)
+        return self.interval_s
@@ -1,8 +1,13 @@
 import struct
-from dataclasses import dataclass
-from typing import Optional, Dict
+from dataclasses import asdict, dataclass
+from typing import Optional, Dict, Iterable, List, Tuple
 
-from .config import COMM_FW_VERSION, COMM_GET_VALUES
+from .config import (
+    COMM_FW_VERSION,
+    COMM_GET_VALUES,
+    COMM_GET_VALUES_SETUP,
+    COMM_GET_VALUES_SETUP_SELECTIVE,
+)
 
 @dataclass
 class FirmwareInfo:
@@ -43,6 +48,9 @@ def buffer_get_int16(payload: bytes, index: int) -> int:
 def buffer_get_int32(payload: bytes, index: int) -> int:
     return struct.unpack_from(">i", payload, index)[0]
 
+def buffer_get_uint32(payload: bytes, index: int) -> int:
+    return struct.unpack_from(">I", payload, index)[0]
+
 def buffer_get_float16(payload: bytes, index: int, scale: float) -> float:
     return buffer_get_int16(payload, index) / float(scale)
 
@@ -80,6 +88,10 @@ MC_FAULT_NAMES: Dict[int, str] = {
     27: "FAULT_CODE_PHASE_FILTER",
 }
 
+# Byte offset of vescId in a COMM_GET_VALUES payload, for cheap routing
+# without a full decode.
+GET_VALUES_VESC_ID_OFFSET = 58
+
 def decode_get_values_payload_dart_style(payload: bytes) -> Optional[dict]:
     if not payload or payload[0] != COMM_GET_VALUES:
         return None
@@ -122,3 +134,103 @@ def decode_get_values_payload_dart_style(payload: bytes) -> Optional[dict]:
 
     except Exception:
         return None
+
+# COMM_GET_VALUES_SETUP fields in reply order: (mask bit, key, type, scale).
+# Totals (*Tot, numVescs, wattHoursLeft) are summed by the firmware over
+# all VESCs on the CAN bus; the rest describe the answering node.
+# Types: f16/f32 = scaled int16/int32, u8, u32.
+SETUP_FIELDS: List[Tuple[int, str, str, float]] = [
+    (0, "tempMos", "f16", 10.0),
+    (1, "tempMotor", "f16", 10.0),
+    (2, "currentTot", "f32", 100.0),
+    (3, "currentInTot", "f32", 100.0),
+    (4, "dutyNow", "f16", 1000.0),
+    (5, "rpm", "f32", 1.0),
+    (6, "speed", "f32", 1000.0),             # m/s
+    (7, "vIn", "f16", 10.0),
+    (8, "batteryLevel", "f16", 1000.0),      # 0..1
+    (9, "ampHoursTot", "f32", 10000.0),
+    (10, "ampHoursChargedTot", "f32", 10000.0),
+    (11, "wattHoursTot", "f32", 10000.0),
+    (12, "wattHoursChargedTot", "f32", 10000.0),
+    (13, "distance", "f32", 1000.0),         # m
+    (14, "distanceAbs", "f32", 1000.0),      # m
+    (15, "pidPos", "f32", 1000000.0),
+    (16, "faultCode", "u8", 1.0),
+    (17, "vescId", "u8", 1.0),
+    (18, "numVescs", "u8", 1.0),
+    (19, "wattHoursLeft", "f32", 1000.0),
+    (20, "odometer", "u32", 1.0),            # m
+    (21, "uptimeMs", "u32", 1.0),
+]
+
+SETUP_MASK_ALL = 0xFFFFFFFF
+
+def setup_mask(keys: Iterable[str]) -> int:
+    """
+    COMM_GET_VALUES_SETUP_SELECTIVE mask for the given field keys.
+    """
+    bits = {key: bit for bit, key, _, _ in SETUP_FIELDS}
+    mask = 0
+    for key in keys:
+        if key not in bits:
+            raise ValueError(f"Unknown COMM_GET_VALUES_SETUP field {key!r}")
+        mask |= 1 << bits[key]
+    return mask
+
+def decode_get_values_setup_payload(payload: bytes) -> Optional[dict]:
+    """
+    Decode a COMM_GET_VALUES_SETUP or COMM_GET_VALUES_SETUP_SELECTIVE reply
+    (the selective reply echoes its mask first; only masked fields follow).
+    """
+    if not payload or payload[0] not in (COMM_GET_VALUES_SETUP, COMM_GET_VALUES_SETUP_SELECTIVE):
+        return None
+
+    try:
+        index = 1
+        mask = SETUP_MASK_ALL
+        if payload[0] == COMM_GET_VALUES_SETUP_SELECTIVE:
+            mask = buffer_get_uint32(payload, index); index += 4
+
+        out = {}
+        for bit, key, kind, scale in SETUP_FIELDS:
+            if not mask & (1 << bit):
+                continue
+            if index >= len(payload):
+                break  # older firmware sends fewer fields
+            if kind == "f16":
+                out[key] = buffer_get_float16(payload, index, scale); index += 2
+            elif kind == "f32":
+                out[key] = buffer_get_float32(payload, index, scale); index += 4
+            elif kind == "u32":
+                out[key] = buffer_get_uint32(payload, index); index += 4
+            else:
+                out[key] = payload[index]; index += 1
+
+        if "faultCode" in out:
+            out["faultName"] = MC_FAULT_NAMES.get(out["faultCode"], f"FAULT_CODE[{out['faultCode']}]")
+
+        out["_decoded_len"] = index
+        out["_payload_len"] = len(payload)
+        return out
+
+    except Exception:
+        return None
+
+def decode_payload(payload: bytes) -> Optional[dict]:
+    """
+    Decode any supported reply payload into a dict, keyed on its COMM ID.
+    Returns None for unknown or malformed payloads.
+    """
+    if not payload:
+        return None
+
+    pkt = payload[0]
+    if pkt == COMM_FW_VERSION:
+        info = decode_fw_version_payload(payload)
+        return asdict(info) if info else None
+    if pkt == COMM_GET_VALUES:
+        return decode_get_values_payload_dart_style(payload)
+    if pkt in (COMM_GET_VALUES_SETUP, COMM_GET_VALUES_SETUP_SELECTIVE):
+        return decode_get_values_setup_payload(payload)
+    return None
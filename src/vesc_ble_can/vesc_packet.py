@@ -1,8 +1,14 @@
+import struct
+from functools import lru_cache
+from typing import Iterable, Optional
+
 from .vesc_crc import crc16_ccitt_init0
 from .config import (
     COMM_FORWARD_CAN,
     COMM_FW_VERSION,
     COMM_GET_VALUES,
+    COMM_GET_VALUES_SETUP,
+    COMM_GET_VALUES_SETUP_SELECTIVE,
     COMM_CUSTOM_APP_DATA,
 )
 
@@ -12,13 +18,65 @@ def vesc_pack_short(payload: bytes) -> bytes:
     crc = crc16_ccitt_init0(payload, 0, len(payload))
     return bytes([0x02, len(payload)]) + payload + bytes([(crc >> 8) & 0xFF, crc & 0xFF]) + bytes([0x03])
 
-def make_forward_can_fw_req(can_id: int) -> bytes:
-    payload = bytes([COMM_FORWARD_CAN, can_id & 0xFF, COMM_FW_VERSION])
+def vesc_pack(payload: bytes) -> bytes:
+    """
+    Frame a payload, using the long (0x03, 16-bit length) format when needed.
+    """
+    if len(payload) < 256:
+        return vesc_pack_short(payload)
+    if len(payload) > 0xFFFF:
+        raise ValueError("Payload too large for a VESC frame.")
+    crc = crc16_ccitt_init0(payload, 0, len(payload))
+    n = len(payload)
+    return bytes([0x03, (n >> 8) & 0xFF, n & 0xFF]) + payload + bytes([(crc >> 8) & 0xFF, crc & 0xFF, 0x03])
+
+def make_forward_can(can_id: int, payload: bytes) -> bytes:
+    """
+    Build a CAN-forwarded packet for an arbitrary command payload
+    (payload[0] is the COMM ID).
+    """
+    return vesc_pack(bytes([COMM_FORWARD_CAN, can_id & 0xFF]) + payload)
+
+@lru_cache(maxsize=None)
+def make_forward_can_request(can_id: int, comm_id: int) -> bytes:
+    """
+    Build (once) and cache a fixed, argument-less CAN-forwarded request.
+
+    The returned bytes are immutable, so callers can reuse the same object
+    every poll cycle without re-encoding or recomputing the CRC.
+    """
+    payload = bytes([COMM_FORWARD_CAN, can_id & 0xFF, comm_id & 0xFF])
     return vesc_pack_short(payload)
 
+def make_forward_can_fw_req(can_id: int) -> bytes:
+    return make_forward_can_request(can_id & 0xFF, COMM_FW_VERSION)
+
 def make_forward_can_get_values(can_id: int) -> bytes:
-    payload = bytes([COMM_FORWARD_CAN, can_id & 0xFF, COMM_GET_VALUES])
-    return vesc_pack_short(payload)
+    return make_forward_can_request(can_id & 0xFF, COMM_GET_VALUES)
+
+def encode_poll_cycle(can_ids: Iterable[int], comm_id: int = COMM_GET_VALUES) -> bytes:
+    """
+    Pre-encode one full poll cycle (one request per CAN ID) into a single
+    contiguous buffer, suitable for writing in MTU-sized slices.
+    """
+    return _encode_poll_cycle(tuple(cid & 0xFF for cid in can_ids), comm_id & 0xFF)
+
+@lru_cache(maxsize=64)
+def _encode_poll_cycle(can_ids: tuple, comm_id: int) -> bytes:
+    return b"".join(make_forward_can_request(cid, comm_id) for cid in can_ids)
+
+@lru_cache(maxsize=64)
+def make_get_values_setup(can_id: Optional[int] = None, mask: Optional[int] = None) -> bytes:
+    """
+    Build (once) a COMM_GET_VALUES_SETUP request, or the _SELECTIVE variant
+    when a field mask is given (see vesc_decode.setup_mask). With can_id the
+    request is forwarded to that node, which answers with bus-wide totals.
+    """
+    if mask is None:
+        payload = bytes([COMM_GET_VALUES_SETUP])
+    else:
+        payload = bytes([COMM_GET_VALUES_SETUP_SELECTIVE]) + struct.pack(">I", mask & 0xFFFFFFFF)
+    return make_forward_can(can_id, payload) if can_id is not None else vesc_pack(payload)
 
 def make_custom_app_data(data: bytes) -> bytes:
     """
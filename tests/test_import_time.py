@@ -0,0 +1,54 @@
+"""
+The offline code paths (decode, parser, CLI entry point) must import without
+Bleak or asyncio and stay fast; see examples/bench_import_time.py for timings.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+MODULES = [
+    "vesc_ble_can",
+    "vesc_ble_can.vesc_crc",
+    "vesc_ble_can.vesc_packet",
+    "vesc_ble_can.vesc_decode",
+    "vesc_ble_can.ble_helper",
+    "vesc_ble_can.cli",
+]
+
+# Generous: a cold import is ~30 ms here, the regression this guards against
+# (pulling in Bleak / asyncio) costs several times that
+BUDGET_S = 0.5
+
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t
+print(json.dumps({{"seconds": dt, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _import_in_fresh_interpreter(module: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (SRC, env.get("PYTHONPATH")) if p)
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_offline_import_is_light(module):
+    result = _import_in_fresh_interpreter(module)
+    heavy = [m for m in result["modules"] if m in ("bleak", "asyncio") or m.startswith("bleak.")]
+    assert not heavy, f"import {module} pulled in {heavy}"
+    assert result["seconds"] < BUDGET_S